@@ -36,20 +36,240 @@ if sys.version_info[0] == 2:
 import yaml
 import subprocess
 import argparse
+import atexit
+import codecs
 import logging
 import json
+import locale
 import re
 import shutil
+import hashlib
+import itertools
+import pickle
+import Queue as queue
 import signal
+import tempfile
 import threading
-from datetime import datetime
+from datetime import datetime, timedelta
 from collections import defaultdict
+from multiprocessing.pool import ThreadPool
+
+# Prefer the LibYAML-backed loader, fall back to the pure Python one
+try:
+    from yaml import CSafeLoader as YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as YamlSafeLoader
 
 # Default timeout for git commands (seconds)
 GIT_COMMAND_TIMEOUT = 1800
 
+# Refspec fetching only the sync_state branch
+SYNC_STATE_REFSPEC = '+refs/heads/sync_state:refs/remotes/origin/sync_state'
+
+# Cache of parsed configuration files, keyed by content hash
+CONFIG_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'git_sync')
+
+# Environment overrides for git commands that only read the repository: no optional
+# index.lock refresh (as 'git status' would do) and no credential prompts, a lazy blob
+# fetch in a partial clone must not wait for input
+READ_ONLY_GIT_ENV = {'GIT_OPTIONAL_LOCKS': '0', 'GIT_TERMINAL_PROMPT': '0'}
+
+# Minimum git version used for partial clone (--filter=blob:none) and protocol v2
+PARTIAL_CLONE_MIN_GIT_VERSION = (2, 22)
+
+# Minimum git version for a blob-less fetch from source next to the blob-less origin (several promisor remotes)
+SOURCE_PARTIAL_FETCH_MIN_GIT_VERSION = (2, 26)
+
+# Minimum git version for 'git fetch --stdin --no-write-fetch-head' (fetching a list of missing blobs)
+FETCH_STDIN_MIN_GIT_VERSION = (2, 29)
+
+# Minimum git version for 'git worktree add --detach --no-checkout' (parallel branch sync)
+WORKTREE_MIN_GIT_VERSION = (2, 9)
+
+def _get_fallback_output_encoding():
+    """Pick the decoder for git output that is not valid UTF-8, once per process
+
+    GBK-family locales (e.g. Chinese Windows) commonly produce GBK file names;
+    anything else is decoded as UTF-8 with replacement characters.
+    """
+    try:
+        encoding = codecs.lookup(locale.getpreferredencoding(False)).name
+    except (LookupError, ValueError):
+        return 'utf-8'
+    return encoding if encoding in ('gbk', 'gb18030', 'gb2312') else 'utf-8'
+
+FALLBACK_OUTPUT_ENCODING = _get_fallback_output_encoding()
+
+def _decode_git_output(data):
+    """Decode git output: UTF-8 first, then the locale fallback with invalid bytes replaced"""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode(FALLBACK_OUTPUT_ENCODING, errors='replace')
+
+def _read_only_git_env():
+    """Environment for a read-only git command, the current environment plus READ_ONLY_GIT_ENV"""
+    env = dict(os.environ)
+    env.update(READ_ONLY_GIT_ENV)
+    return env
+
+def _iter_nul_fields(output):
+    """Yield the NUL separated fields of -z output one by one, without building a list"""
+    start = 0
+    while start < len(output):
+        end = output.find('\0', start)
+        if end < 0:
+            end = len(output)
+        yield output[start:end]
+        start = end + 1
+
+def _iter_numstat_paths(output):
+    """Yield the paths of 'git diff-tree --numstat -z' output, the new path for a rename
+
+    Entries are "added\tdeleted\tpath", or "added\tdeleted\t" followed by
+    the old and the new path as separate fields for a rename.
+    """
+    fields = _iter_nul_fields(output)
+    for field in fields:
+        path = field.split('\t', 2)[-1]
+        if not path:
+            next(fields, None)
+            path = next(fields, '')
+        if path:
+            yield path
+
+def _iter_raw_log_commits(fields):
+    """Group the fields of 'git log -z -m --raw --no-renames --format=%H %s' into commits
+
+    Yields (hash, subject, changes), changes being the (new blob id, path)
+    pairs of the files the commit adds or modifies. A merge repeats its
+    header for every parent with -m, the changes of all of them are joined.
+    """
+    fields = iter(fields)
+    current_hash = current_subject = None
+    changes = []
+    for field in fields:
+        field = field.lstrip('\n')
+        if field.startswith(':'):
+            # ":<old mode> <new mode> <old oid> <new oid> <status>", the path follows
+            path = next(fields, '')
+            parts = field.split(' ')
+            if len(parts) == 5 and parts[4] != 'D' and parts[1] != '160000':
+                changes.append((parts[3], path))
+            continue
+        commit_hash, _, subject = field.partition(' ')
+        if current_hash is not None and current_hash != commit_hash:
+            yield current_hash, current_subject, changes
+            changes = []
+        current_hash, current_subject = commit_hash, subject
+    if current_hash is not None:
+        yield current_hash, current_subject, changes
+
+# Detached HEAD files hold just the commit id (SHA-1 or SHA-256)
+OBJECT_ID_RE = re.compile(r'^[0-9a-f]{40}(?:[0-9a-f]{24})?$')
+
+# Line 'git cherry-pick -x' appends to the message of each picked commit
+CHERRY_PICKED_FROM_RE = re.compile(r'^\(cherry picked from commit ([0-9a-f]+)\)$', re.M)
+
+AUTHOR_LINE_RE = re.compile(r'^author (.*) <(.*)> (\d+) ([+-])(\d\d)(\d\d)$')
+
+def _parse_commit_object(oid, payload):
+    """Parse a raw commit object into the commit info dict (hash/author/email/date/message)
+
+    The date is the author date in the commit's own timezone, formatted like
+    'git log --date=iso'; the message is the subject (first paragraph, joined).
+    """
+    headers, _, body = _decode_git_output(payload).partition('\n\n')
+    for line in headers.split('\n'):
+        match = AUTHOR_LINE_RE.match(line)
+        if match:
+            break
+    else:
+        return None
+    author, email, timestamp, sign, tz_hours, tz_minutes = match.groups()
+    offset = int(tz_hours) * 3600 + int(tz_minutes) * 60
+    local_time = datetime(1970, 1, 1) + timedelta(seconds=int(timestamp) + (offset if sign == '+' else -offset))
+    subject = ' '.join(body.strip().split('\n\n', 1)[0].split('\n')) if body.strip() else ''
+    return {
+        'hash': oid,
+        'author': author,
+        'email': email,
+        'date': '%s %s%s%s' % (local_time.strftime('%Y-%m-%d %H:%M:%S'), sign, tz_hours, tz_minutes),
+        'message': subject
+    }
+
+def _memoize(func):
+    """Cache results of a one-argument function (functools.lru_cache is Python 3 only)"""
+    cache = {}
+
+    def wrapper(arg):
+        try:
+            return cache[arg]
+        except KeyError:
+            result = cache[arg] = func(arg)
+            return result
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+# URL helpers are pure functions of their argument and memoized, the same few URLs
+# are compared on every work directory verification
+@_memoize
+def _normalize_url(url):
+    """Normalize URL for comparison by removing trailing slashes and converting to lowercase"""
+    if not url:
+        return ""
+    
+    # Remove trailing slashes
+    normalized = url.rstrip('/')
+    
+    # Convert to lowercase for case-insensitive comparison
+    normalized = normalized.lower()
+    
+    # Remove .git suffix if present
+    if normalized.endswith('.git'):
+        normalized = normalized[:-4]
+    
+    return normalized
+
+@_memoize
+def _remove_auth_from_url(url):
+    """Remove authentication credentials from URL for comparison"""
+    if not url:
+        return ""
+    
+    # Handle HTTP/HTTPS URLs with embedded credentials
+    if url.startswith(('http://', 'https://')):
+        # Split protocol and rest
+        protocol, rest = url.split('://', 1)
+        
+        # Check if there are credentials (username:password@)
+        if '@' in rest:
+            # Split at @ to separate credentials from host
+            auth_part, host_part = rest.rsplit('@', 1)
+            # Return URL without credentials
+            return protocol + '://' + host_part
+    
+    # For SSH URLs or URLs without credentials, return as-is
+    return url
+
+# Extensions of the files checked for LFS; a tuple, so str.endswith checks all of them in one call
+BINARY_FILE_EXTS = ('.tar', '.gz', '.zip', '.jar', '.dll', '.so', '.lib', '.exe')
+
+# Not memoized on Python 2.7, _memoize has no size bound and the paths of a large repository are unbounded
+def _is_binary_file(rel_path):
+    """Check whether rel_path has one of BINARY_FILE_EXTS, case-insensitively"""
+    return rel_path.lower().endswith(BINARY_FILE_EXTS)
+
 # Global configuration and state
 class GitSyncConfig(object):
+    # Fixed attribute layout, no per-instance __dict__
+    __slots__ = (
+        'global_source_base', 'global_dest_base', 'global_commit_username', 'global_commit_useremail',
+        'global_auth_type', 'global_ssh_key', 'global_auth_user', 'global_auth_pass',
+        'global_lfs_file_threshold', 'global_lfs_threshold', 'global_workspace',
+        'repositories', 'force_full', 'verbose', 'jobs', 'branch_jobs',
+    )
+
     def __init__(self):
         # Global settings
         self.global_source_base = ""
@@ -70,8 +290,19 @@ class GitSyncConfig(object):
         # Runtime state
         self.force_full = False
         self.verbose = False
+        self.jobs = 0  # Number of repositories synced in parallel (0 = auto)
+        self.branch_jobs = 0  # Number of branches synced in parallel per repository (0 = auto)
 
 class Repository(object):
+    # Fixed attribute layout, no per-instance __dict__
+    __slots__ = (
+        'name', 'source_repo', 'dest_repo', 'clean_history', 'workspace',
+        'auth_type', 'auth_ssh_key', 'auth_user', 'auth_pass',
+        'enable_lfs', 'lfs_file_threshold', 'lfs_file_threshold_bytes', 'lfs_threshold', 'lfs_threshold_bytes',
+        'branch_map', 'ignore_branches', 'ignore_pattern',
+        'source_url', 'dest_url', 'dest_url_with_auth', 'workspace_path',
+    )
+
     def __init__(self, name):
         self.name = name
         self.source_repo = ""
@@ -84,18 +315,130 @@ class Repository(object):
         self.auth_pass = ""
         self.enable_lfs = False
         self.lfs_file_threshold = 0
+        self.lfs_file_threshold_bytes = 0  # lfs_file_threshold converted once for size checks
         self.lfs_threshold = 0
+        self.lfs_threshold_bytes = 0  # lfs_threshold converted once, bounds each step-by-step push
         self.branch_map = {}
         self.ignore_branches = []
-        
-        # Control whether to add original commit hash to commit message
-        self.add_original_hash = False
+        self.ignore_pattern = None  # Single regex compiled from ignore_branches
         
         # Resolved values
         self.source_url = ""
         self.dest_url = ""
+        self.dest_url_with_auth = ""  # dest_url with encoded credentials, built once in load_config
         self.workspace_path = ""
 
+class GitCommandError(Exception):
+    """A git command exited with a non-zero status"""
+
+    def __init__(self, message, returncode, output=None):
+        Exception.__init__(self, message)
+        self.returncode = returncode
+        self.output = output  # Decoded output of check_output commands
+
+class _LogFormatter(logging.Formatter):
+    """Formatter for '[LEVEL:line] message' output, with WARNING shortened to WARN"""
+    SHORT_LEVELS = {logging.WARNING: 'WARN'}
+
+    def format(self, record):
+        record.shortlevel = self.SHORT_LEVELS.get(record.levelno, record.levelname)
+        return logging.Formatter.format(self, record)
+
+class _StdoutLogHandler(logging.StreamHandler):
+    """stdout handler for records below WARNING
+
+    Skips the per-record flush and leaves buffering to sys.stdout: a terminal
+    stays line-buffered, redirected output is written in blocks.
+    """
+
+    def __init__(self):
+        logging.StreamHandler.__init__(self, sys.stdout)
+
+    def filter(self, record):
+        return record.levelno < logging.WARNING and logging.StreamHandler.filter(self, record)
+
+    def flush(self):
+        pass
+
+class _StderrLogHandler(logging.StreamHandler):
+    """stderr handler for WARNING and above, shown immediately"""
+
+    def __init__(self):
+        logging.StreamHandler.__init__(self, sys.stderr)
+        self.setLevel(logging.WARNING)
+
+    def emit(self, record):
+        # Write out pending stdout lines first so combined logs keep their order
+        sys.stdout.flush()
+        logging.StreamHandler.emit(self, record)
+
+class _GitBatch(object):
+    """Long-running 'git cat-file --batch' process bound to one repository
+
+    Object and ref lookups are written to the process stdin one per line
+    instead of spawning a new git process for every lookup. With check_only
+    the process runs '--batch-check' and only reports oid, type and size.
+    """
+    def __init__(self, repo_dir, check_only=False):
+        self.repo_dir = repo_dir
+        self.check_only = check_only
+        self.proc = None
+        self.lock = threading.Lock()
+
+    def _start(self):
+        mode = '--batch-check' if self.check_only else '--batch'
+        # close_fds: Python 2 would leak the stdin pipes of other batch processes into
+        # this child, and those would then never see EOF on close()
+        self.proc = subprocess.Popen(['git', 'cat-file', mode], cwd=self.repo_dir, env=_read_only_git_env(),
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0,
+                                     close_fds=True)
+
+    def _read_exact(self, size):
+        chunks = []
+        while size > 0:
+            chunk = self.proc.stdout.read(size)
+            if not chunk:
+                raise Exception("git cat-file batch process exited unexpectedly")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    def get(self, spec):
+        """Look up an object spec such as '<rev>' or '<rev>:<path>'
+
+        Returns (oid, type, payload), (oid, type, size) for a check_only
+        process, or None if the object does not exist.
+        """
+        with self.lock:
+            if self.proc is None or self.proc.poll() is not None:
+                self._start()
+            self.proc.stdin.write(spec.encode('utf-8') + b'\n')
+
+            # Reply framing: "<oid> <type> <size>\n<payload>\n" or "<spec> missing\n"
+            header = self.proc.stdout.readline()
+            if not header:
+                self.close()
+                raise Exception("git cat-file batch process exited unexpectedly")
+            if header.endswith((b' missing\n', b' ambiguous\n')):
+                return None
+            oid, obj_type, size = header.decode('utf-8').split()
+            if self.check_only:
+                return oid, obj_type, int(size)
+            payload = self._read_exact(int(size))
+            self._read_exact(1)
+            return oid, obj_type, payload
+
+    def close(self):
+        """Terminate the batch process"""
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.close()
+            self.proc.wait()
+        except (OSError, ValueError):
+            pass
+        self.proc = None
+
 class GitSyncTool(object):
     def __init__(self):
         self.config = GitSyncConfig()
@@ -111,90 +454,144 @@ class GitSyncTool(object):
                 'end_time': None
             }
         }
-    
+
+        # Guards self.report while repositories sync in parallel
+        self._report_lock = threading.Lock()
+        
+        # Persistent 'git cat-file' processes keyed by (work directory, check_only)
+        self._git_batches = {}
+        self._git_batches_lock = threading.Lock()
+        atexit.register(self._close_git_batches)
+        
+        # Commit info of source branch refs keyed by (work directory, ref), loaded after each source fetch
+        self._commit_info_cache = {}
+        self._commit_info_cache_lock = threading.Lock()
+        
+        # Serialized sync state last read from or pushed to each repository's sync_state branch
+        self._sync_state_json = {}
+        
+        # Installed git version, probed once on first use
+        self._git_version = None
+        
+        # Serializes writes to a repository's shared .git/config from parallel branch syncs
+        self._git_config_lock = threading.Lock()
+        
+        # One lock per work directory, repositories resolving to the same one never sync at once
+        self._work_dir_locks = defaultdict(threading.Lock)
+        self._work_dir_locks_lock = threading.Lock()
+
+    def __del__(self):
+        self._close_git_batches()
+
+    def _git_batch(self, work_dir, check_only=False):
+        """Get (lazily starting) the cat-file batch process for a work directory"""
+        key = (work_dir, check_only)
+        with self._git_batches_lock:
+            batch = self._git_batches.get(key)
+            if batch is None:
+                batch = _GitBatch(work_dir, check_only)
+                self._git_batches[key] = batch
+            return batch
+
+    def _resolve_rev(self, work_dir, rev):
+        """Resolve a revision (ref, HEAD, '<rev>:<path>') to its oid, None if it does not exist"""
+        found = self._git_batch(work_dir, check_only=True).get(rev)
+        return found[0] if found else None
+
+    def _read_head(self, work_dir):
+        """Get the commit HEAD of work_dir points to
+        
+        Sync work happens on a detached HEAD, so .git/HEAD (or the HEAD file in the
+        git directory a work tree's .git file points to) normally holds the commit
+        id itself. Symbolic or unreadable HEADs are resolved by git.
+        """
+        git_dir = os.path.join(work_dir, '.git')
+        try:
+            if os.path.isfile(git_dir):
+                with open(git_dir) as f:
+                    gitdir_line = f.read().strip()
+                if gitdir_line.startswith('gitdir: '):
+                    git_dir = os.path.join(work_dir, gitdir_line[len('gitdir: '):])
+            with open(os.path.join(git_dir, 'HEAD')) as f:
+                head = f.read().strip()
+            if OBJECT_ID_RE.match(head):
+                return head
+        except (IOError, OSError):
+            pass
+        return self._resolve_rev(work_dir, 'HEAD')
+
+    def _close_git_batches(self, work_dir=None):
+        """Close cat-file batch processes (all of them, or only for work_dir)"""
+        with self._git_batches_lock:
+            if work_dir is None:
+                batches = list(self._git_batches.values())
+                self._git_batches.clear()
+            else:
+                batches = [self._git_batches.pop(key) for key in list(self._git_batches) if key[0] == work_dir]
+        for batch in batches:
+            batch.close()
+
     def _setup_logging(self):
         """Setup logging configuration"""
         logger = logging.getLogger('git_sync')
         logger.setLevel(logging.INFO)
+        logger.propagate = False
         
-        # Console handler
-        console_handler = logging.StreamHandler()
-        formatter = logging.Formatter('[%(levelname)s] %(message)s')
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        # Console handlers, only installed once per process
+        if not logger.handlers:
+            formatter = _LogFormatter('[%(shortlevel)s:%(lineno)d] %(message)s')
+            for handler in (_StdoutLogHandler(), _StderrLogHandler()):
+                handler.setFormatter(formatter)
+                logger.addHandler(handler)
+            atexit.register(sys.stdout.flush)
         
         return logger
     
-    def log_info(self, message):
-        """Log info message"""
-        import inspect
-        frame = inspect.currentframe().f_back
-        line_no = frame.f_lineno
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        print("[INFO:%d] %s" % (line_no, message))
-        sys.stdout.flush()
-    
-    def log_error(self, message):
-        """Log error message"""
-        import inspect
-        frame = inspect.currentframe().f_back
-        line_no = frame.f_lineno
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        print("[ERROR:%d] %s" % (line_no, message))
-        sys.stderr.flush()
-    
-    def log_warn(self, message):
-        """Log warning message"""
-        import inspect
-        frame = inspect.currentframe().f_back
-        line_no = frame.f_lineno
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        print("[WARN:%d] %s" % (line_no, message))
-        sys.stdout.flush()
-    
-    def log_debug(self, message):
-        """Log debug message"""
-        if self.config and self.config.verbose:
-            import inspect
-            frame = inspect.currentframe().f_back
-            line_no = frame.f_lineno
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            print("[DEBUG:%d] %s" % (line_no, message))
-            sys.stdout.flush()
-    
     def check_dependencies(self):
         """Check required dependencies"""
-        self.log_info("Checking dependencies...")
+        self.logger.info("Checking dependencies...")
         
         required_tools = ['git']
         for tool in required_tools:
             try:
                 subprocess.check_output([tool, '--version'], stderr=subprocess.STDOUT)
-                self.log_debug("Found %s" % tool)
+                self.logger.debug("Found %s", tool)
             except (subprocess.CalledProcessError, OSError):
                 raise Exception("Required tool '%s' not found. Please install it." % tool)
         
-        self.log_info("All dependencies satisfied.")
+        self.logger.info("All dependencies satisfied.")
+    
+    def _get_git_version(self):
+        """Get installed git version as a tuple of ints, e.g. (2, 39, 5)"""
+        if self._git_version is None:
+            try:
+                output = self._run_git_command(['git', '--version'], check_output=True)
+                match = re.search(r'(\d+)\.(\d+)(?:\.(\d+))?', output)
+                self._git_version = tuple(int(part or 0) for part in match.groups()) if match else (0, 0, 0)
+            except Exception:
+                self._git_version = (0, 0, 0)
+            self.logger.debug("Detected git version: %s", '.'.join(str(part) for part in self._git_version))
+        return self._git_version
     
     def check_lfs_if_needed(self):
         """Check Git LFS availability when needed"""
         try:
             subprocess.check_output(['git', 'lfs', 'version'], stderr=subprocess.STDOUT)
-            self.log_debug("Git LFS is available")
+            self.logger.debug("Git LFS is available")
             return True
         except (subprocess.CalledProcessError, OSError):
-            self.log_error("Git LFS is required but not available")
+            self.logger.error("Git LFS is required but not available")
             return False
     
     def load_config(self, config_file):
         """Load and parse YAML configuration file"""
-        self.log_info("Loading configuration from '%s'..." % config_file)
+        self.logger.info("Loading configuration from '%s'...", config_file)
         
         if not os.path.exists(config_file):
             raise Exception("Configuration file '%s' not found." % config_file)
         
-        with open(config_file, 'r') as f:
-            config_data = yaml.safe_load(f)
+        with open(config_file, 'rb') as f:
+            config_data = self._parse_config_data(f.read())
         
         # Parse global configuration
         global_config = config_data.get('global', {})
@@ -232,6 +629,8 @@ class GitSyncTool(object):
             # LFS thresholds with global inheritance
             repo.lfs_file_threshold = repo_config.get('lfs_file_threshold_mb', 0) or self.config.global_lfs_file_threshold
             repo.lfs_threshold = repo_config.get('lfs_total_threshold_mb', 0) or self.config.global_lfs_threshold
+            repo.lfs_file_threshold_bytes = int(repo.lfs_file_threshold * 1024 * 1024)
+            repo.lfs_threshold_bytes = int(repo.lfs_threshold * 1024 * 1024)
             
             # Auth settings (inherit from global if not specified) with enhanced robustness
             repo_auth = repo_config.get('auth')
@@ -250,9 +649,15 @@ class GitSyncTool(object):
             ignore_branches = repo_config.get('ignore_branches', [])
             repo.ignore_branches = ignore_branches
             
+            # Compile all ignore patterns into one alternation once per repository ('*' matches any characters)
+            if ignore_branches:
+                repo.ignore_pattern = re.compile('^(?:%s)$' % '|'.join(
+                    '(?:%s)' % str(pattern).replace('*', '.*') for pattern in ignore_branches))
+            
             # Resolve URLs
             repo.source_url = self._resolve_url(repo.source_repo, self.config.global_source_base)
             repo.dest_url = self._resolve_url(repo.dest_repo, self.config.global_dest_base)
+            repo.dest_url_with_auth = self._add_auth_to_url(repo.dest_url, repo.auth_user, repo.auth_pass)
             
             # Resolve workspace (already inherited above, just convert to absolute path)
             if repo.workspace:
@@ -265,9 +670,43 @@ class GitSyncTool(object):
                 os.makedirs(repo.workspace_path)
             
             self.config.repositories.append(repo)
-            self.log_info("Repository '%s' configured." % repo.name)
+            self.logger.info("Repository '%s' configured.", repo.name)
+        
+        self.logger.info("Configuration loaded successfully. Found %d repositories.", len(self.config.repositories))
+    
+    def _parse_config_data(self, raw):
+        """Parse YAML config content, reusing the cached result for identical content"""
+        digest = hashlib.sha256(raw).hexdigest()
+        cache_file = os.path.join(CONFIG_CACHE_DIR, 'config-py%d-%s.pickle' % (sys.version_info[0], digest))
+        
+        try:
+            with open(cache_file, 'rb') as f:
+                config_data = pickle.load(f)
+            self.logger.debug("Using cached configuration: %s", cache_file)
+            return config_data
+        except Exception:
+            # No usable cache entry, parse the file
+            pass
+        
+        config_data = yaml.load(raw, Loader=YamlSafeLoader)
         
-        self.log_info("Configuration loaded successfully. Found %d repositories." % len(self.config.repositories))
+        # The parsed config may contain credentials, keep the cache private
+        tmp_file = '%s.%d.tmp' % (cache_file, os.getpid())
+        try:
+            if not os.path.isdir(CONFIG_CACHE_DIR):
+                os.makedirs(CONFIG_CACHE_DIR, 0o700)
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(config_data, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_file, cache_file)
+        except Exception as e:
+            self.logger.debug("Failed to cache configuration: %s", str(e))
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+        
+        return config_data
     
     def _resolve_url(self, repo_url, base_url):
         """Resolve repository URL with base URL and authentication"""
@@ -313,7 +752,7 @@ class GitSyncTool(object):
                 encoded_username = urllib.parse.quote(str(username), safe='')
                 encoded_password = urllib.parse.quote(str(password), safe='')
         except Exception as e:
-            self.log_warn("Failed to URL encode credentials: %s" % str(e))
+            self.logger.warning("Failed to URL encode credentials: %s", str(e))
             # Fallback to original values if encoding fails
             encoded_username = str(username)
             encoded_password = str(password)
@@ -325,84 +764,47 @@ class GitSyncTool(object):
         
         return url
     
-    def _normalize_url(self, url):
-        """Normalize URL for comparison by removing trailing slashes and converting to lowercase"""
-        if not url:
-            return ""
-        
-        # Remove trailing slashes
-        normalized = url.rstrip('/')
-        
-        # Convert to lowercase for case-insensitive comparison
-        normalized = normalized.lower()
-        
-        # Remove .git suffix if present
-        if normalized.endswith('.git'):
-            normalized = normalized[:-4]
-        
-        return normalized
-    
-    def _remove_auth_from_url(self, url):
-        """Remove authentication credentials from URL for comparison"""
-        if not url:
-            return ""
-        
-        # Handle HTTP/HTTPS URLs with embedded credentials
-        if url.startswith(('http://', 'https://')):
-            # Split protocol and rest
-            protocol, rest = url.split('://', 1)
-            
-            # Check if there are credentials (username:password@)
-            if '@' in rest:
-                # Split at @ to separate credentials from host
-                auth_part, host_part = rest.rsplit('@', 1)
-                # Return URL without credentials
-                return protocol + '://' + host_part
-        
-        # For SSH URLs or URLs without credentials, return as-is
-        return url
-    
-    def _run_git_command(self, cmd, cwd=None, check_output=False, timeout=None):
+    def _run_git_command(self, cmd, cwd=None, check_output=False, timeout=None, input_data=None, read_only=False):
         """Execute git command with proper error handling, output control and timeout
         
         Args:
-            cmd: Command string to execute
+            cmd: Argument list to execute (e.g. ['git', 'fetch', 'origin']),
+                 run directly without a shell
             cwd: Working directory
             check_output: If True, capture and return stdout
             timeout: Timeout in seconds (default: GIT_COMMAND_TIMEOUT)
+            input_data: Bytes written to the command's stdin (requires check_output)
+            read_only: The command only reads the repository, run it with READ_ONLY_GIT_ENV
         """
         if timeout is None:
             timeout = GIT_COMMAND_TIMEOUT
+        env = _read_only_git_env() if read_only else None
         
         try:
             if check_output:
                 # Use Popen with timeout for Python 2.7 compatibility
-                proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True)
+                proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                        stdin=subprocess.PIPE if input_data is not None else None)
                 timer = threading.Timer(timeout, self._kill_process, [proc, cmd])
                 try:
                     timer.start()
-                    result, _ = proc.communicate()
+                    result, _ = proc.communicate(input_data)
                 finally:
                     timer.cancel()
                 
                 if proc.returncode != 0:
                     raise subprocess.CalledProcessError(proc.returncode, cmd, output=result)
                 
-                # Try multiple encoding methods to decode the output
-                try:
-                    return result.decode('utf-8').strip()
-                except UnicodeDecodeError:
-                    try:
-                        return result.decode('gbk').strip()
-                    except UnicodeDecodeError:
-                        return result.decode('utf-8', errors='ignore').strip()
+                return _decode_git_output(result).strip()
             else:
                 # Control output based on verbose mode
                 if self.verbose:
-                    proc = subprocess.Popen(cmd, cwd=cwd, shell=True)
+                    # git writes to the same stdout, emit buffered log lines before it
+                    sys.stdout.flush()
+                    proc = subprocess.Popen(cmd, cwd=cwd, env=env)
                 else:
                     devnull = open(os.devnull, 'w')
-                    proc = subprocess.Popen(cmd, cwd=cwd, shell=True, stdout=devnull)
+                    proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=devnull)
                 
                 timer = threading.Timer(timeout, self._kill_process, [proc, cmd])
                 try:
@@ -418,37 +820,27 @@ class GitSyncTool(object):
                 return None
         except subprocess.CalledProcessError as e:
             # Handle encoding issues in command and output
-            try:
-                if isinstance(cmd, unicode):
-                    cmd_str = cmd.encode('utf-8')
-                else:
-                    cmd_str = cmd
-            except:
-                cmd_str = repr(cmd)
+            cmd_str = ' '.join(cmd)
         
+            error_output = None
             try:
                 error_msg = u"Git command failed: %s" % cmd_str
                 # Always show error output regardless of verbose mode
                 if hasattr(e, 'output') and e.output:
-                    try:
-                        error_output = e.output.decode('utf-8')
-                    except UnicodeDecodeError:
-                        try:
-                            error_output = e.output.decode('gbk')
-                        except UnicodeDecodeError:
-                            error_output = e.output.decode('utf-8', errors='ignore')
+                    error_output = _decode_git_output(e.output)
                     error_msg += u"\nOutput: %s" % error_output
             except UnicodeDecodeError:
                 # Fallback to safe representation
                 error_msg = "Git command failed: %s" % repr(cmd)
                 if hasattr(e, 'output') and e.output:
                     error_msg += "\nOutput: %s" % repr(e.output)
-            raise Exception(error_msg)
+            raise GitCommandError(error_msg, e.returncode, error_output)
     
     def _kill_process(self, proc, cmd):
         """Kill a timed-out process and its children"""
         try:
-            self.log_error("Git command timed out after %d seconds: %s" % (GIT_COMMAND_TIMEOUT, cmd))
+            cmd_str = ' '.join(cmd)
+            self.logger.error("Git command timed out after %d seconds: %s", GIT_COMMAND_TIMEOUT, cmd_str)
             # Kill the process group on Unix, or just the process on Windows
             try:
                 os.kill(proc.pid, signal.SIGKILL)
@@ -458,18 +850,61 @@ class GitSyncTool(object):
                 proc.kill()
             except OSError:
                 pass
-        except:
+        except Exception:
             pass
+
+    def _git_stream(self, cmd, cwd=None, separator=b'\n', read_only=False):
+        """Run a git command and yield its output records as they arrive
+
+        Records are split on separator (b'\0' for -z output) and decoded; empty
+        records are skipped. The caller sets the pace, so there is no timeout:
+        git blocks on the full pipe while the records are being processed.
+        Raises GitCommandError once the output ends if git failed. Closing the
+        generator early kills the process.
+        """
+        proc = subprocess.Popen(cmd, cwd=cwd, env=_read_only_git_env() if read_only else None,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, close_fds=True)
+        try:
+            pending = b''
+            while True:
+                chunk = os.read(proc.stdout.fileno(), 65536)
+                if not chunk:
+                    break
+                records = (pending + chunk).split(separator)
+                pending = records.pop()
+                for record in records:
+                    if record:
+                        yield _decode_git_output(record)
+            if pending:
+                yield _decode_git_output(pending)
+            error_output = proc.stderr.read()
+            if proc.wait() != 0:
+                error_output = _decode_git_output(error_output)
+                raise GitCommandError("Git command failed: %s\nOutput: %s" % (' '.join(cmd), error_output),
+                                      proc.returncode, error_output)
+        finally:
+            if proc.poll() is None:
+                try:
+                    proc.kill()
+                except OSError:
+                    pass
+                proc.wait()
+            proc.stdout.close()
+            proc.stderr.close()
+
+    def _should_use_lfs(self, size_bytes, threshold_bytes):
+        """Check if a file of size_bytes should use LFS based on size threshold"""
+        return size_bytes >= threshold_bytes
     
-    def _get_file_size_mb(self, file_path):
-        """Get file size in MB"""
-        if not os.path.exists(file_path):
-            return 0
-        return os.path.getsize(file_path) / (1024.0 * 1024.0)
-    
-    def _should_use_lfs(self, file_path, threshold_mb):
-        """Check if file should use LFS based on size threshold"""
-        return self._get_file_size_mb(file_path) > threshold_mb
+    def _iter_index_files(self, work_dir):
+        """Yield (relative path, blob id) for the files in the index of work_dir"""
+        output = self._run_git_command(['git', 'ls-files', '-s', '-z'], cwd=work_dir, check_output=True, read_only=True)
+        # Entries are "<mode> <oid> <stage>\t<path>"
+        for entry in _iter_nul_fields(output):
+            info, _, rel = entry.partition('\t')
+            fields = info.split()
+            if rel and len(fields) == 3 and not fields[0].startswith('160'):
+                yield rel, fields[1]
     
     def _setup_lfs_for_repo(self, repo_dir):
         """Setup Git LFS for repository"""
@@ -477,11 +912,13 @@ class GitSyncTool(object):
             return False
         
         try:
-            self._run_git_command('git lfs install', cwd=repo_dir)
-            self.log_info("Git LFS initialized for repository")
+            # 'git lfs install' writes the config shared by all work trees of the repository
+            with self._git_config_lock:
+                self._run_git_command(['git', 'lfs', 'install'], cwd=repo_dir)
+            self.logger.info("Git LFS initialized for repository")
             return True
         except Exception as e:
-            self.log_error("Failed to setup LFS: %s" % str(e))
+            self.logger.error("Failed to setup LFS: %s", str(e))
             return False
     
     def _get_branches(self, repo_dir, remote_only=True, remote_prefix='origin/'):
@@ -493,72 +930,63 @@ class GitSyncTool(object):
             remote_prefix: Prefix for remote branches (e.g., 'origin/', 'source/')
         """
         try:
-            if remote_only:
-                # Get remote branches only
-                cmd = 'git branch -r'
+            if remote_prefix:
+                # Only refs of the requested remote, e.g. refs/remotes/source/
+                ref_prefixes = ['refs/remotes/' + remote_prefix]
             else:
-                # Get all branches (local + remote)
-                cmd = 'git branch -a'
-            
-            output = self._run_git_command(cmd, cwd=repo_dir, check_output=True)
+                ref_prefixes = ['refs/remotes/']
+            if not remote_only:
+                # Include local branches as well
+                ref_prefixes.append('refs/heads/')
             
-            # Debug: Log the raw git branch output
-            self.log_debug("Raw git branch output for %s:" % remote_prefix)
-            for line_num, line in enumerate(output.split('\n'), 1):
-                if line.strip():
-                    self.log_debug("  %d: '%s'" % (line_num, line))
+            # for-each-ref prints one full ref name per line, without markers or symref arrows
+            output = self._run_git_command(['git', 'for-each-ref', '--format=%(refname)'] + ref_prefixes,
+                                           cwd=repo_dir, check_output=True, read_only=True)
             
             branches = []
+            seen = set()
             
-            for line in output.split('\n'):
-                line = line.strip()
-                if not line or '->' in line or line.startswith('*'):
-                    continue
-                
-                # Clean branch name - remove prefixes based on remote_prefix
-                if remote_prefix and line.startswith(remote_prefix):
-                    branch = line[len(remote_prefix):]
-                elif not remote_prefix:
-                    # Only use fallback logic when no specific remote_prefix is requested
-                    branch = line.replace('origin/', '').replace('remotes/', '').replace('remotes/origin/', '')
+            for ref in output.splitlines():
+                if ref.startswith('refs/heads/'):
+                    branch = ref[len('refs/heads/'):]
+                elif remote_prefix:
+                    branch = ref[len('refs/remotes/' + remote_prefix):]
                 else:
-                    # Skip branches that don't match the specified remote_prefix
-                    continue
+                    # Strip refs/remotes/<remote>/
+                    branch = ref[len('refs/remotes/'):].partition('/')[2]
                 
                 # Skip HEAD reference
-                if branch == 'HEAD':
+                if not branch or branch == 'HEAD' or branch in seen:
                     continue
-                
-                if branch and branch not in branches:
-                    branches.append(branch)
+                seen.add(branch)
+                branches.append(branch)
             
             # Special case: prioritize master or main branch to the top of the list
-            if 'master' in branches:
+            if 'master' in seen:
                 branches.remove('master')
                 branches.insert(0, 'master')
-            elif 'main' in branches:
+            elif 'main' in seen:
                 branches.remove('main')
                 branches.insert(0, 'main')
             
+            self.logger.debug("Branches for %s: %r", remote_prefix or 'all remotes', branches)
             return branches if branches is not None else []
         except Exception as e:
-            self.log_error("Failed to get branches: %s" % str(e))
+            self.logger.error("Failed to get branches: %s", str(e))
             return []  # Always return empty list, never None
     
-    def _should_ignore_branch(self, branch, ignore_list):
-        """Check if branch should be ignored"""
+    def _should_ignore_branch(self, branch, ignore_pattern):
+        """Check if branch should be ignored
+        
+        Args:
+            branch: Branch name
+            ignore_pattern: Compiled ignore regex (Repository.ignore_pattern), None if no patterns
+        """
         # Always ignore internal state management branch
         if branch == 'sync_state':
             return True
         
-        # Safety check: handle None ignore_list
-        if ignore_list is None:
-            return False
-        
-        for ignore_pattern in ignore_list:
-            if re.match(ignore_pattern.replace('*', '.*'), branch):
-                return True
-        return False
+        return ignore_pattern is not None and ignore_pattern.match(branch) is not None
     
     def _map_branch_name(self, branch, branch_map):
         """Map branch name according to configuration"""
@@ -573,15 +1001,37 @@ class GitSyncTool(object):
         try:
             return self._fetch_remote_sync_state(repo)
         except Exception as e:
-            self.log_warn("Failed to fetch remote sync state: %s" % str(e))
+            self.logger.warning("Failed to fetch remote sync state: %s", str(e))
             # If remote sync_state branch doesn't exist or fails, treat as no state
-            self.log_info("No remote sync state found, treating as first-time sync")
+            self.logger.info("No remote sync state found, treating as first-time sync")
             return {
                 'last_sync': None,
                 'synced_branches': {},
                 'last_commits': {}
             }
     
+    def _fetch_sync_state_branch(self, work_dir):
+        """Fetch origin's sync_state branch into refs/remotes/origin/sync_state
+        
+        The exact refspec fails when origin has no sync_state branch. That case
+        is not an error, the stale local copy (if any) is deleted instead.
+        """
+        try:
+            # Output is captured so a missing branch does not print git's fatal error
+            self._run_git_command(['git', 'fetch', '--no-tags', 'origin', SYNC_STATE_REFSPEC], cwd=work_dir, check_output=True)
+        except GitCommandError as fetch_err:
+            missing = False
+            try:
+                self._run_git_command(['git', 'ls-remote', '--exit-code', 'origin', 'refs/heads/sync_state'],
+                                      cwd=work_dir, check_output=True)
+            except GitCommandError as probe_err:
+                # --exit-code reports a missing ref with status 2
+                missing = probe_err.returncode == 2
+            if not missing:
+                raise fetch_err
+            if self._resolve_rev(work_dir, 'refs/remotes/origin/sync_state') is not None:
+                self._run_git_command(['git', 'update-ref', '-d', 'refs/remotes/origin/sync_state'], cwd=work_dir)
+    
     def _fetch_remote_sync_state(self, repo):
         """Fetch sync state from remote sync_state branch using unified work directory"""
         # Use unified work directory
@@ -594,225 +1044,362 @@ class GitSyncTool(object):
         }
         
         try:
+            # Ask the destination for sync_state first, a first-time sync then needs no fetch at all
+            remote_sha = None
+            try:
+                output = self._run_git_command(['git', 'ls-remote', '--exit-code', repo.dest_url_with_auth, 'refs/heads/sync_state'],
+                                               check_output=True)
+                for line in output.splitlines():
+                    if line.endswith('\trefs/heads/sync_state'):
+                        remote_sha = line.split('\t', 1)[0]
+            except GitCommandError as probe_err:
+                # --exit-code reports a missing ref with status 2
+                if probe_err.returncode == 2:
+                    self.logger.info("No sync_state branch found, using default state")
+                    return default_state
+                self.logger.warning("Failed to query sync_state on origin: %s", str(probe_err))
+            
             # Ensure work directory is set up with proper remotes
             self._setup_unified_work_dir(work_dir, repo)
+            batch = self._git_batch(work_dir)
             
-            # Fetch latest changes from origin (destination repository)
             fetch_ok = True
-            try:
-                self._run_git_command('git fetch origin --prune', cwd=work_dir)
-            except Exception as fetch_err:
-                fetch_ok = False
-                self.log_warn("Failed to fetch origin: %s" % str(fetch_err))
-                self.log_info("Will try to use locally cached sync_state branch")
-            
-            # Check if sync_state branch exists on origin (or in local cache)
-            try:
-                # First check if origin/sync_state exists (works with local cache even if fetch failed)
-                self._run_git_command('git show-ref --verify refs/remotes/origin/sync_state', cwd=work_dir, check_output=True)
-                # If it exists, checkout the branch
-                self._run_git_command('git checkout -B sync_state origin/sync_state', cwd=work_dir)
-                if fetch_ok:
-                    self.log_info("Found existing sync_state branch")
-                else:
-                    self.log_info("Using locally cached sync_state branch (fetch failed)")
-            except:
+            local_state = batch.get('refs/remotes/origin/sync_state')
+            if remote_sha is not None and local_state is not None and local_state[0] == remote_sha:
+                # The cached copy already matches origin, nothing to fetch
+                self.logger.debug("Local sync_state branch is up to date with origin")
+            else:
+                # Fetch the sync_state branch from origin (destination repository)
+                try:
+                    self._fetch_sync_state_branch(work_dir)
+                except Exception as fetch_err:
+                    fetch_ok = False
+                    self.logger.warning("Failed to fetch origin: %s", str(fetch_err))
+                    self.logger.info("Will try to use locally cached sync_state branch")
+                local_state = batch.get('refs/remotes/origin/sync_state')
+            
+            # Check if sync_state branch exists on origin (or in local cache, which works even if fetch failed)
+            if local_state is None:
                 # sync_state branch doesn't exist, return default state
-                self.log_info("No sync_state branch found, using default state")
+                self.logger.info("No sync_state branch found, using default state")
                 return default_state
-            
-            # Read sync_state.json from the branch
-            state_file = os.path.join(work_dir, 'sync_state.json')
-            if os.path.exists(state_file):
-                with open(state_file, 'r') as f:
-                    state = json.load(f)
-                    if fetch_ok:
-                        self.log_info("Successfully loaded sync state from remote")
-                    else:
-                        self.log_info("Successfully loaded sync state from local cache")
-                    return state
+            if fetch_ok:
+                self.logger.info("Found existing sync_state branch")
             else:
-                self.log_info("No sync_state.json found in sync_state branch")
+                self.logger.info("Using locally cached sync_state branch (fetch failed)")
+
+            # Read sync_state.json directly from the branch without checking it out
+            state_blob = batch.get('refs/remotes/origin/sync_state:sync_state.json')
+            if state_blob is not None:
+                state = json.loads(state_blob[2].decode('utf-8'))
+                self._sync_state_json[repo.name] = self._serialize_sync_state(state)
+                if fetch_ok:
+                    self.logger.info("Successfully loaded sync state from remote")
+                else:
+                    self.logger.info("Successfully loaded sync state from local cache")
+                return state
+            else:
+                self.logger.info("No sync_state.json found in sync_state branch")
                 return default_state
                 
         except Exception as e:
             # Handle potential encoding issues with Chinese characters
             try:
                 error_msg = unicode(str(e), 'utf-8') if isinstance(str(e), str) else str(e)
-            except:
+            except UnicodeDecodeError:
                 error_msg = repr(e)
-            self.log_warn("Failed to fetch sync state: %s" % error_msg)
+            self.logger.warning("Failed to fetch sync state: %s", error_msg)
             return default_state
     
+    def _is_work_dir_intact(self, work_dir):
+        """Check that an existing work directory still holds a connected object graph"""
+        try:
+            self._run_git_command(['git', 'fsck', '--no-dangling', '--connectivity-only'], cwd=work_dir, check_output=True)
+            return True
+        except Exception as e:
+            self.logger.warning("Work directory integrity check failed: %s", str(e))
+            return False
+    
+    def _get_work_dir_config(self, work_dir):
+        """Read remote URLs and user identity of a work directory with one git config call
+        
+        Returns a dict such as {'remote.origin.url': ..., 'user.name': ...}; keys that
+        are not set are absent.
+        """
+        try:
+            output = self._run_git_command(['git', 'config', '--get-regexp', r'^(remote\..*\.url|user\.(name|email))$'],
+                                           cwd=work_dir, check_output=True, read_only=True)
+        except Exception:
+            # Exit code 1 means no key matched
+            return {}
+        
+        values = {}
+        for line in output.splitlines():
+            key, _, value = line.partition(' ')
+            values[key] = value
+        return values
+    
+    def _recreate_work_dir(self, work_dir, repo):
+        """Remove a broken work directory and clone it again"""
+        self._close_git_batches(work_dir)
+        shutil.rmtree(work_dir)
+        self.logger.info("Recreating work directory")
+        return self._setup_unified_work_dir(work_dir, repo)
+    
     def _setup_unified_work_dir(self, work_dir, repo):
         """Setup unified work directory with source and destination remotes"""
         try:
             if not os.path.exists(work_dir):
                 # Create new work directory by cloning destination repository
-                self.log_debug("Creating unified work directory")
+                self.logger.debug("Creating unified work directory")
                 
                 # Get destination URL with authentication
-                dest_url_with_auth = self._add_auth_to_url(repo.dest_url, repo.auth_user, repo.auth_pass)
                 
-                # Clone destination repository as base
-                self.log_info("Cloning destination repository: %s" % repo.dest_url)
-                self._run_git_command('git clone "%s" "%s"' % (dest_url_with_auth, work_dir))
+                # Clone destination repository as base. The source remote and the
+                # commit user are written by the clone itself (-c) instead of
+                # separate 'git remote add' / 'git config' processes.
+                clone_config = [
+                    'remote.source.url=%s' % repo.source_url,
+                    'remote.source.fetch=+refs/heads/*:refs/remotes/source/*'
+                ]
+                if self.config.global_commit_username:
+                    clone_config.append('user.name=%s' % self.config.global_commit_username)
+                if self.config.global_commit_useremail:
+                    clone_config.append('user.email=%s' % self.config.global_commit_useremail)
+                
+                # Only sync_state and the refs we cherry-pick onto are needed, so on
+                # recent git use a blob-less partial clone (blobs are fetched on
+                # demand) without tags, negotiated over protocol v2.
+                if self._get_git_version() >= PARTIAL_CLONE_MIN_GIT_VERSION:
+                    clone_cmd = ['git', '-c', 'protocol.version=2', 'clone', '--no-tags', '--filter=blob:none']
+                else:
+                    clone_cmd = ['git', 'clone']
+                for entry in clone_config:
+                    clone_cmd += ['-c', entry]
+                clone_cmd += [repo.dest_url_with_auth, work_dir]
                 
-                # Add source repository as remote
-                self._run_git_command('git remote add source "%s"' % repo.source_url, cwd=work_dir)
+                self.logger.info("Cloning destination repository: %s", repo.dest_url)
+                self._run_git_command(clone_cmd)
                 
-                self.log_info("Unified work directory created with source and origin remotes")
+                self.logger.info("Unified work directory created with source and origin remotes")
             else:
                 # Verify and update existing work directory
-                self.log_info("Verifying existing unified work directory")
+                self.logger.info("Verifying existing unified work directory")
+                
+                # A directory without its own .git would make git operate on an enclosing repository
+                if not os.path.exists(os.path.join(work_dir, '.git')):
+                    self.logger.warning("Work directory is not a git repository, recreating: %s", work_dir)
+                    return self._recreate_work_dir(work_dir, repo)
+                
+                # Read remote URLs and commit identity in one call
+                git_config = self._get_work_dir_config(work_dir)
                 
                 try:
-                    # Check origin remote URL (compatible with older git versions)
-                    origin_url = self._run_git_command('git config --get remote.origin.url', cwd=work_dir, check_output=True).strip()
-                    # Remove authentication from URL for comparison
-                    dest_url_with_auth = self._add_auth_to_url(repo.dest_url, repo.auth_user, repo.auth_pass)
-                    origin_url_clean = self._remove_auth_from_url(origin_url)
-                    
-                    if self._normalize_url(origin_url_clean) != self._normalize_url(repo.dest_url):
-                        # Wrong destination repository, recreate
-                        self.log_warn("Destination repository mismatch, recreating work directory. Expected: %s, Found: %s" % (repo.dest_url, origin_url))
-                        shutil.rmtree(work_dir)
-                        self.log_info("Recreated work directory")
-                        return self._setup_unified_work_dir(work_dir, repo)
-                    
-                    # Update origin URL with authentication
-                    if dest_url_with_auth != origin_url:
-                        self._run_git_command('git remote set-url origin "%s"' % dest_url_with_auth, cwd=work_dir)
-                        self.log_info("Updated origin remote with authentication: %s" % repo.dest_url)
+                    origin_url = git_config.get('remote.origin.url')
+                    if origin_url is None:
+                        # Origin remote missing, add it back
+                        self._run_git_command(['git', 'remote', 'add', 'origin', repo.dest_url_with_auth], cwd=work_dir)
+                        self.logger.warning("Origin remote missing, added: %s", repo.dest_url)
+                    else:
+                        # Remove authentication from URL for comparison
+                        origin_url_clean = _remove_auth_from_url(origin_url)
+                        if _normalize_url(origin_url_clean) != _normalize_url(repo.dest_url):
+                            # Wrong destination repository, repoint origin; the next fetch refreshes its refs
+                            self.logger.warning("Destination repository mismatch, updating origin remote. Expected: %s, Found: %s", repo.dest_url, origin_url_clean)
+                            self._run_git_command(['git', 'remote', 'set-url', 'origin', repo.dest_url_with_auth], cwd=work_dir)
+                        elif repo.dest_url_with_auth != origin_url:
+                            # Update origin URL with authentication
+                            self._run_git_command(['git', 'remote', 'set-url', 'origin', repo.dest_url_with_auth], cwd=work_dir)
+                            self.logger.info("Updated origin remote with authentication: %s", repo.dest_url)
                     
-                    # Check if source remote exists (compatible with older git versions)
-                    try:
-                        source_url = self._run_git_command('git config --get remote.source.url', cwd=work_dir, check_output=True).strip()
-                        source_url_clean = self._remove_auth_from_url(source_url)
-                        if self._normalize_url(source_url_clean) != self._normalize_url(repo.source_url):
-                            # Update source remote
-                            self._run_git_command('git remote set-url source "%s"' % repo.source_url, cwd=work_dir)
-                            self.log_info("Updated source remote URL: %s" % repo.source_url)
-                    except:
+                    # Check if source remote exists
+                    source_url = git_config.get('remote.source.url')
+                    if source_url is None:
                         # Source remote doesn't exist, add it
-                        self._run_git_command('git remote add source "%s"' % repo.source_url, cwd=work_dir)
-                        self.log_info("Added source remote: %s" % repo.source_url)
+                        self._run_git_command(['git', 'remote', 'add', 'source', repo.source_url], cwd=work_dir)
+                        self.logger.info("Added source remote: %s", repo.source_url)
+                    elif _normalize_url(_remove_auth_from_url(source_url)) != _normalize_url(repo.source_url):
+                        # Update source remote
+                        self._run_git_command(['git', 'remote', 'set-url', 'source', repo.source_url], cwd=work_dir)
+                        self.logger.info("Updated source remote URL: %s", repo.source_url)
                     
                 except Exception as e:
-                    # If verification fails, recreate directory
-                    self.log_warn("Work directory verification failed: %s" % str(e))
-                    shutil.rmtree(work_dir)
-                    self.log_info("Recreating work directory")
-                    return self._setup_unified_work_dir(work_dir, repo)
-            
-            # Configure git user for commits
-            if self.config.global_commit_username:
-                self._run_git_command('git config user.name "%s"' % self.config.global_commit_username, cwd=work_dir)
-            if self.config.global_commit_useremail:
-                self._run_git_command('git config user.email "%s"' % self.config.global_commit_useremail, cwd=work_dir)
-            self.log_info("Unified work directory setup completed")
+                    # Only recreate when the repository itself is damaged
+                    self.logger.warning("Work directory verification failed: %s", str(e))
+                    if self._is_work_dir_intact(work_dir):
+                        raise
+                    return self._recreate_work_dir(work_dir, repo)
+                
+                # Configure git user for commits, skipping values that are already in place
+                if self.config.global_commit_username and git_config.get('user.name') != self.config.global_commit_username:
+                    self._run_git_command(['git', 'config', 'user.name', self.config.global_commit_username], cwd=work_dir)
+                if self.config.global_commit_useremail and git_config.get('user.email') != self.config.global_commit_useremail:
+                    self._run_git_command(['git', 'config', 'user.email', self.config.global_commit_useremail], cwd=work_dir)
+            
+            self.logger.info("Unified work directory setup completed")
             return True
             
         except Exception as e:
             # Handle potential encoding issues with Chinese characters
             try:
                 error_msg = unicode(str(e), 'utf-8') if isinstance(str(e), str) else str(e)
-            except:
+            except UnicodeDecodeError:
                 error_msg = repr(e)
-            self.log_error("Failed to setup unified work directory: %s" % error_msg)
+            self.logger.error("Failed to setup unified work directory: %s", error_msg)
             return False
     
     def _save_sync_state(self, repo, state):
         """Save synchronization state to remote sync_state branch using unified work directory"""
         try:
             self._push_remote_sync_state(repo, state)
-            self.log_info("Sync state successfully saved to remote sync_state branch")
+            self.logger.info("Sync state successfully saved to remote sync_state branch")
         except Exception as e:
-            self.log_error("Failed to push sync state to remote: %s" % str(e))
-            self.log_warn("Sync state could not be saved - will treat as first-time sync on next run")
+            self.logger.error("Failed to push sync state to remote: %s", str(e))
+            self.logger.warning("Sync state could not be saved - will treat as first-time sync on next run")
+    
+    def _serialize_sync_state(self, state):
+        """Serialize sync state as compact JSON with sorted keys, equal states give equal bytes"""
+        return json.dumps(state, sort_keys=True, separators=(',', ':'))
     
     def _push_remote_sync_state(self, repo, state):
         """Push sync state to remote sync_state branch using unified work directory"""
         # Use unified work directory
         work_dir = os.path.join(repo.workspace_path, repo.name, 'sync_work')
         
+        state_json = self._serialize_sync_state(state)
+        if self._sync_state_json.get(repo.name) == state_json:
+            # Same state as read from or last pushed to origin, skip fetch, commit and push
+            self.logger.info("No changes in sync state, skipping commit")
+            return
+        
         try:
             # Ensure work directory is set up with proper remotes
             if not self._setup_unified_work_dir(work_dir, repo):
                 raise Exception("Failed to setup unified work directory")
             
-            # Fetch latest changes from origin
-            self._run_git_command('git fetch origin --prune', cwd=work_dir)
-            
-            # Handle sync_state branch checkout
-            try:
-                # Delete local branch if it exists
-                try:
-                    self._run_git_command('git branch -D sync_state', cwd=work_dir, check_output=True)
-                except:
-                    pass
-
-                # Check if remote sync_state branch exists
-                self._run_git_command('git show-ref --verify refs/remotes/origin/sync_state', cwd=work_dir, check_output=True)
-                
-                # Check if local sync_state branch exists
-                try:
-                    self._run_git_command('git show-ref --verify refs/heads/sync_state', cwd=work_dir, check_output=True)
-                    # Local branch exists, switch to it and reset to remote
-                    self._run_git_command('git checkout sync_state', cwd=work_dir)
-                    self._run_git_command('git reset --hard origin/sync_state', cwd=work_dir)
-                    self.log_info("Switched to existing local sync_state branch and reset to remote")
-                except:
-                    # Local branch doesn't exist, create from remote
-                    self._run_git_command('git checkout -b sync_state origin/sync_state', cwd=work_dir)
-                    self.log_info("Created local sync_state branch from remote")
-            except:
-                # Remote sync_state branch doesn't exist, create new orphan branch
-                self._run_git_command('git checkout --orphan sync_state', cwd=work_dir)
-                # Remove all files from the new branch
-                try:
-                    self._run_git_command('git rm -rf .', cwd=work_dir)
-                except:
-                    # If git rm fails (no files to remove), that's fine
-                    pass
-                self.log_info("Created new orphan sync_state branch")
-            
-            # Write sync_state.json to the branch
-            state_file = os.path.join(work_dir, 'sync_state.json')
-            with open(state_file, 'w') as f:
-                json.dump(state, f, indent=2)
-            
-            # Add and commit the state file
-            self._run_git_command('git add sync_state.json', cwd=work_dir)
+            # Fetch latest sync_state branch from origin
+            self._fetch_sync_state_branch(work_dir)
             
-            # Check if there are changes to commit
-            try:
-                self._run_git_command('git diff --cached --exit-code', cwd=work_dir)
+            # Git blob id of the new content, compared with the fetched sync_state.json without spawning git
+            state_data = state_json.encode('utf-8')
+            state_blob_sha = hashlib.sha1(b'blob %d\0' % len(state_data) + state_data).hexdigest()
+            if self._resolve_rev(work_dir, 'refs/remotes/origin/sync_state:sync_state.json') == state_blob_sha:
                 # No changes, skip commit
-                self.log_info("No changes in sync state, skipping commit")
+                self.logger.info("No changes in sync state, skipping commit")
+                self._sync_state_json[repo.name] = state_json
                 return
-            except:
-                # There are changes, proceed with commit
-                pass
             
-            # Commit the changes
+            # Build the sync_state commit with plumbing so the working tree and HEAD are never touched
+            blob_sha = self._run_git_command(['git', 'hash-object', '-w', '--stdin'], cwd=work_dir, check_output=True,
+                                             input_data=state_data)
+            tree_sha = self._run_git_command(['git', 'mktree'], cwd=work_dir, check_output=True,
+                                             input_data=('100644 blob %s\tsync_state.json\n' % blob_sha).encode('utf-8'))
+            parent = self._resolve_rev(work_dir, 'refs/remotes/origin/sync_state')
+            
             commit_message = "Update sync state - %s" % datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self._run_git_command('git commit -m "%s"' % commit_message, cwd=work_dir)
+            commit_cmd = ['git', 'commit-tree', tree_sha, '-m', commit_message]
+            if parent is not None:
+                commit_cmd += ['-p', parent]
+            else:
+                self.logger.info("Creating new sync_state branch")
+            commit_sha = self._run_git_command(commit_cmd, cwd=work_dir, check_output=True)
+            self._run_git_command(['git', 'update-ref', 'refs/heads/sync_state', commit_sha], cwd=work_dir)
             
             # Push to remote
-            self._run_git_command('git push origin sync_state', cwd=work_dir)
+            self._run_git_command(['git', 'push', 'origin', 'refs/heads/sync_state:refs/heads/sync_state'], cwd=work_dir)
+            self._sync_state_json[repo.name] = state_json
             
-            self.log_info("Successfully pushed sync state to remote")
+            self.logger.info("Successfully pushed sync state to remote")
             
         except Exception as e:
             # Handle potential encoding issues with Chinese characters
             try:
                 error_msg = unicode(str(e), 'utf-8') if isinstance(str(e), str) else str(e)
-            except:
+            except UnicodeDecodeError:
                 error_msg = repr(e)
-            self.log_error("Failed to push sync state: %s" % error_msg)
+            self.logger.error("Failed to push sync state: %s", error_msg)
             raise
     
+    def _load_commit_info_cache(self, work_dirs, ref_prefixes):
+        """Read commit info of all refs under ref_prefixes with one for-each-ref call
+        
+        The refs are shared by the unified work directory and its work trees, so
+        the entries are stored for each of work_dirs. Entries loaded earlier for
+        these work directories are dropped, their refs were just fetched again.
+        
+        Returns the names of all refs found (an empty list if the call failed).
+        """
+        with self._commit_info_cache_lock:
+            for key in [k for k in self._commit_info_cache if k[0] in work_dirs]:
+                del self._commit_info_cache[key]
+        
+        try:
+            output = self._run_git_command(
+                ['git', 'for-each-ref',
+                 '--format=%(refname)%00%(objecttype)%00%(objectname)%00%(authorname)%00%(authoremail)%00%(authordate:iso)%00%(subject)']
+                + ref_prefixes,
+                cwd=work_dirs[0], check_output=True, read_only=True)
+        except Exception as e:
+            self.logger.debug("Could not preload commit info for %s: %s", ', '.join(ref_prefixes), str(e))
+            return []
+        
+        refs = []
+        entries = {}
+        for line in output.splitlines():
+            fields = line.split('\0')
+            if len(fields) != 7:
+                continue
+            refs.append(fields[0])
+            if fields[1] != 'commit':
+                continue
+            entries[fields[0]] = {
+                'hash': fields[2],
+                'author': fields[3],
+                'email': fields[4].strip('<>'),
+                'date': fields[5],
+                'message': fields[6]
+            }
+        
+        with self._commit_info_cache_lock:
+            for work_dir in work_dirs:
+                for ref, commit_info in entries.items():
+                    self._commit_info_cache[(work_dir, ref)] = commit_info
+        self.logger.debug("Preloaded commit info for %d refs under %s", len(entries), ', '.join(ref_prefixes))
+        return refs
+    
+    def _delete_local_branches(self, work_dir, refs):
+        """Delete local branch refs left by earlier versions that synced on named branches
+        
+        Branches are built on a detached HEAD now, so every refs/heads/* except
+        sync_state is stale. All deletions go through one 'git update-ref --stdin'
+        transaction.
+        """
+        stale = [ref for ref in refs if ref.startswith('refs/heads/') and ref != 'refs/heads/sync_state']
+        if not stale:
+            return
+        try:
+            self._run_git_command(['git', 'update-ref', '--no-deref', '--stdin'], cwd=work_dir, check_output=True,
+                                  input_data=''.join('delete %s\n' % ref for ref in stale).encode('utf-8'))
+            self.logger.info("Deleted %d stale local branches", len(stale))
+        except Exception as e:
+            self.logger.warning("Failed to delete stale local branches: %s", str(e))
+    
+    def _get_commit_hash(self, repo_dir, branch, remote_name='origin'):
+        """Get the commit hash of a branch (remote tracking ref first, then local branch)
+        
+        Served from the commit info cache or the batch-check process, the commit
+        itself is not read.
+        """
+        remote_ref = "refs/remotes/%s/%s" % (remote_name, branch)
+        cached = self._commit_info_cache.get((repo_dir, remote_ref))
+        if cached:
+            return cached['hash']
+        try:
+            return self._resolve_rev(repo_dir, remote_ref) or self._resolve_rev(repo_dir, "refs/heads/%s" % branch)
+        except Exception as e:
+            self.logger.error("Failed to resolve branch '%s': %s", branch, str(e))
+            return None
+    
     def _get_commit_info(self, repo_dir, branch, commit_hash=None, remote_name='origin'):
         """Get commit information
         
@@ -823,215 +1410,221 @@ class GitSyncTool(object):
             remote_name: Remote name ('origin' for dest repo, 'source' for source repo)
         """
         try:
+            batch = self._git_batch(repo_dir)
             if commit_hash:
-                # For commit hash, use git show command
-                # Use -s instead of --no-patch for better compatibility with older git versions
-                cmd = 'git show --format="%%H|%%an|%%ae|%%ad|%%s" -s "%s"' % commit_hash
-                output = self._run_git_command(cmd, cwd=repo_dir, check_output=True)
+                found = batch.get(commit_hash)
+                if not found:
+                    return None
             else:
-                # For branch names, try comprehensive reference formats
-                # Order matters: try most specific first, then fallback to less specific
-                branch_refs = [
-                    "refs/remotes/%s/%s" % (remote_name, branch),  # Remote tracking branch (primary for unified work dir)
-                    "refs/heads/%s" % branch,                      # Local branch (if checked out)
-                    "%s/%s" % (remote_name, branch),               # Short remote reference
-                    "remotes/%s/%s" % (remote_name, branch),       # Alternative remote format
-                    branch                                         # Bare branch name (fallback)
-                ]
-                
-                output = None
-                successful_ref = None
-                
-                for ref in branch_refs:
-                    try:
-                        # For branch references, don't use -- separator as it's for paths
-                        cmd = 'git log -1 --format="%%H|%%an|%%ae|%%ad|%%s" "%s"' % ref
-                        test_output = self._run_git_command(cmd, cwd=repo_dir, check_output=True)
-                        if test_output and test_output.strip():
-                            output = test_output
-                            successful_ref = ref
-                            self.log_info("Found commit info for branch '%s' using reference '%s'" % (branch, ref))
-                            break
-                    except Exception as ref_error:
-                        self.log_info("Reference '%s' failed: %s" % (ref, str(ref_error)))
-                        continue
-                
-                if not output:
-                    # Last resort: try to list all refs and find a match
-                    try:
-                        self.log_info("Attempting to find branch '%s' in all available references..." % branch)
-                        refs_cmd = 'git for-each-ref --format="%(refname)" refs/'
-                        all_refs = self._run_git_command(refs_cmd, cwd=repo_dir, check_output=True)
-                        
-                        matching_refs = []
-                        for ref_line in all_refs.split('\n'):
-                            if ref_line.strip() and branch in ref_line:
-                                matching_refs.append(ref_line.strip())
-                        
-                        if matching_refs:
-                            self.log_info("Found potential matching refs: %s" % ', '.join(matching_refs))
-                            # Try the first matching ref
-                            cmd = 'git log -1 --format="%%H|%%an|%%ae|%%ad|%%s" "%s"' % matching_refs[0]
-                            output = self._run_git_command(cmd, cwd=repo_dir, check_output=True)
-                            successful_ref = matching_refs[0]
-                        else:
-                            self.log_debug("No matching references found for branch '%s'" % branch)
-                    except Exception as search_error:
-                        self.log_debug("Reference search failed: %s" % str(search_error))
-                
-                if not output:
-                    self.log_error("Could not find commit info for branch '%s' with any reference format" % branch)
+                # Resolve the remote tracking branch (primary for unified work dir) or the local branch
+                remote_ref = "refs/remotes/%s/%s" % (remote_name, branch)
+                local_ref = "refs/heads/%s" % branch
+                cached = self._commit_info_cache.get((repo_dir, remote_ref))
+                if cached:
+                    return dict(cached)
+                found = batch.get(remote_ref)
+                used_ref = remote_ref
+                if not found:
+                    found = batch.get(local_ref)
+                    used_ref = local_ref
+                if not found:
+                    self.logger.error("Could not find commit info for branch '%s' (tried %s, %s)", branch, remote_ref, local_ref)
                     return None
+                self.logger.debug("Found commit info for branch '%s' using reference '%s'", branch, used_ref)
             
-            if not output or not output.strip():
-                return None
-                
-            parts = output.strip().split('|', 4)
-            
-            if len(parts) >= 5:
-                return {
-                    'hash': parts[0],
-                    'author': parts[1],
-                    'email': parts[2],
-                    'date': parts[3],
-                    'message': parts[4]
-                }
-            else:
-                self.log_debug("Invalid commit info format: %s" % output)
-                return None
+            oid, obj_type, payload = found
+            commit_info = _parse_commit_object(oid, payload) if obj_type == 'commit' else None
+            if not commit_info:
+                self.logger.debug("Invalid commit object for %s: %s %s", commit_hash or branch, oid, obj_type)
+            return commit_info
                 
         except Exception as e:
-            self.log_error("Failed to get commit info for branch '%s': %s" % (branch, str(e)))
+            self.logger.error("Failed to get commit info for branch '%s': %s", branch, str(e))
         
         return None
     
     def _is_merge_commit(self, work_dir, commit_hash):
         """Check if a commit is a merge commit (has more than one parent)"""
         try:
-            output = self._run_git_command('git cat-file -p %s' % commit_hash, cwd=work_dir, check_output=True)
-            parent_count = 0
-            for line in output.split('\n'):
-                if line.startswith('parent '):
-                    parent_count += 1
-            return parent_count > 1
-        except:
+            found = self._git_batch(work_dir).get(commit_hash)
+            if not found:
+                return False
+            headers = found[2].split(b'\n\n', 1)[0]
+            return headers.count(b'\nparent ') > 1
+        except Exception:
             return False
 
-    def _cherry_pick_one(self, work_dir, commit_hash):
-        """Cherry-pick a single commit, automatically handling merge commits and empty results"""
+    def _cherry_pick_one(self, work_dir, commit_hash, record_origin=False):
+        """Cherry-pick a single commit, automatically handling merge commits and empty results
+        
+        record_origin passes -x, the message then names the picked commit.
+        """
+        cmd = ['git', 'cherry-pick', '--allow-empty'] + (['-x'] if record_origin else [])
         try:
             if self._is_merge_commit(work_dir, commit_hash):
-                self._run_git_command('git cherry-pick --allow-empty -m 1 %s' % commit_hash, cwd=work_dir)
+                self._run_git_command(cmd + ['-m', '1', commit_hash], cwd=work_dir)
             else:
-                self._run_git_command('git cherry-pick --allow-empty %s' % commit_hash, cwd=work_dir)
+                self._run_git_command(cmd + [commit_hash], cwd=work_dir)
         except Exception as e:
             error_msg = str(e)
             # Handle empty cherry-pick: git stops and asks for manual commit --allow-empty
             if 'allow-empty' in error_msg or 'empty' in error_msg.lower():
-                self.log_info("Empty cherry-pick detected for %s, committing as empty" % commit_hash[:8])
+                self.logger.info("Empty cherry-pick detected for %s, committing as empty", commit_hash[:8])
                 try:
-                    self._run_git_command('git commit --allow-empty --no-edit', cwd=work_dir)
+                    self._run_git_command(['git', 'commit', '--allow-empty', '--no-edit'], cwd=work_dir)
                 except Exception as commit_err:
                     # If commit also fails, skip this commit by resetting
-                    self.log_warn("Failed to commit empty cherry-pick for %s, skipping: %s" % (commit_hash[:8], str(commit_err)))
-                    self._run_git_command('git cherry-pick --abort', cwd=work_dir)
+                    self.logger.warning("Failed to commit empty cherry-pick for %s, skipping: %s", commit_hash[:8], str(commit_err))
+                    self._run_git_command(['git', 'cherry-pick', '--abort'], cwd=work_dir)
             else:
                 raise
 
-    def _calculate_changes_size(self, repo_dir, from_commit=None, to_commit=None):
-        """Calculate total size of changes between commits, handling LFS files correctly"""
+    def _cherry_pick_commits(self, work_dir, commits, record_origin=False):
+        """Cherry-pick commits in order with one 'git cherry-pick' per run of non-merge commits
+
+        Merge commits go through _cherry_pick_one for '-m 1'. Commits that end up
+        empty are kept, as _cherry_pick_one does; record_origin passes -x. Returns
+        the last commit picked, None if there was none.
+        """
+        cmd = ['git', 'cherry-pick', '--keep-redundant-commits', '--stdin'] + (['-x'] if record_origin else [])
+        run = []
+        last_commit = None
+        for commit_hash in itertools.chain(commits, [None]):
+            if commit_hash is not None and not self._is_merge_commit(work_dir, commit_hash):
+                run.append(commit_hash)
+                continue
+            if run:
+                self._run_git_command(cmd, cwd=work_dir, check_output=True, input_data=''.join('%s\n' % c for c in run).encode('utf-8'))
+                last_commit = run[-1]
+                run = []
+            if commit_hash is not None:
+                self._cherry_pick_one(work_dir, commit_hash, record_origin)
+                last_commit = commit_hash
+        return last_commit
+
+    def _add_original_hashes(self, work_dir, base_commit):
+        """Rewrite the commits cherry-picked with -x onto base_commit to the '[SYNC]' message form
+        
+        Gives the message an amend in _sync_single_commit would give, '[SYNC] <subject>'
+        and 'Original SHA: <hash>' of the picked commit, for the whole chain at once:
+        the new commit objects are built here (same tree, author and committer) and
+        written with a single 'git hash-object --stdin-paths', then HEAD moves to the last.
+        """
+        batch = self._git_batch(work_dir)
+        picked = []
+        oid = self._read_head(work_dir)
+        while oid != base_commit:
+            found = batch.get(oid)
+            if not found or found[1] != 'commit':
+                raise Exception("Cannot read cherry-picked commit %s" % oid)
+            headers, _, body = found[2].partition(b'\n\n')
+            picked.append((headers.split(b'\n'), _decode_git_output(body)))
+            parents = [line[7:] for line in headers.split(b'\n') if line.startswith(b'parent ')]
+            if not parents:
+                raise Exception("Commit %s is not based on %s" % (oid, base_commit))
+            oid = parents[0].decode('ascii')
+        picked.reverse()
+        
+        # Object ids of the new commits chain into each other, compute them as git does
+        hash_algo = hashlib.sha1 if len(base_commit) == 40 else hashlib.sha256
+        tmp_dir = tempfile.mkdtemp(prefix='git_sync_')
         try:
-            if from_commit and to_commit:
-                # Use --numstat to get detailed change info including binary file detection
-                cmd = 'git diff --numstat "%s".."%s"' % (from_commit, to_commit)
-            elif from_commit:
-                # Calculate changes from specific commit to HEAD
-                cmd = 'git diff --numstat "%s"..HEAD' % from_commit
-            else:
-                cmd = 'git ls-files'
-            
-            output = self._run_git_command(cmd, cwd=repo_dir, check_output=True)
-            total_size = 0
-            
-            for line in output.split('\n'):
-                if line.strip():
-                    if from_commit:
-                        # git diff --numstat format: "additions deletions filename"
-                        # For binary files shows: "- - filename"
-                        parts = line.split('\t')
-                        if len(parts) >= 3:
-                            additions, deletions, filename = parts[0], parts[1], parts[2]
-                            full_path = os.path.join(repo_dir, filename)
-                            
-                            if os.path.exists(full_path):
-                                # Get actual file size (handle LFS pointer files)
-                                actual_size = self._get_actual_file_size_mb(full_path)
-                                total_size += actual_size
+            paths = []
+            expected = []
+            parent = base_commit
+            for headers, body in picked:
+                origins = CHERRY_PICKED_FROM_RE.findall(body)
+                if not origins:
+                    raise Exception("Cherry-picked commit has no origin line: %s" % body.split('\n', 1)[0])
+                original = origins[-1]
+                original_info = self._get_commit_info(work_dir, None, original, remote_name='source')
+                if not original_info:
+                    raise Exception("Cannot get commit info for: %s" % original)
+                message = "[SYNC] %s\n\nOriginal SHA: %s\n" % (original_info['message'], original)
+                
+                # Signatures and encoding headers would not match the new content, drop them with
+                # their continuation lines
+                kept = []
+                for line in headers:
+                    if line.startswith(b' '):
+                        if kept and kept[-1] is not None:
+                            kept.append(line)
+                    elif line.startswith((b'gpgsig', b'encoding ')):
+                        kept.append(None)
+                    elif line.startswith(b'parent '):
+                        kept.append(b'parent ' + parent.encode('ascii'))
                     else:
-                        # List all files
-                        full_path = os.path.join(repo_dir, line.strip())
-                        if os.path.exists(full_path):
-                            actual_size = self._get_actual_file_size_mb(full_path)
-                            total_size += actual_size
-            
-            self.log_info("Calculated changes size: %.2f MB" % total_size)
-            return total_size
-        except Exception as e:
-            self.log_debug("Failed to calculate changes size: %s" % str(e))
-            return 0
-    
-    def _is_lfs_pointer_file(self, file_path):
-        """Check if file is an LFS pointer file"""
-        try:
-            # LFS pointer files are typically very small (<1KB)
-            if os.path.getsize(file_path) > 1024:
-                return False
-            
-            with open(file_path, 'r') as f:
-                first_line = f.readline().strip()
-                return first_line.startswith('version https://git-lfs.github.com/spec/')
-        except:
-            return False
-    
-    def _get_lfs_file_actual_size(self, file_path):
-        """Get actual size of LFS file from pointer file"""
-        try:
-            with open(file_path, 'r') as f:
-                for line in f:
-                    if line.startswith('size '):
-                        size_bytes = int(line.split()[1])
-                        return size_bytes / (1024.0 * 1024.0)  # Convert to MB
-        except:
-            pass
-        return 0
-    
-    def _get_actual_file_size_mb(self, file_path):
-        """Get file size in MB for Git operations (LFS files use pointer size)
+                        kept.append(line)
+                content = b'\n'.join(line for line in kept if line is not None) + b'\n\n' + message.encode('utf-8')
+                
+                path = os.path.join(tmp_dir, '%d' % len(paths))
+                with open(path, 'wb') as f:
+                    f.write(content)
+                paths.append(path)
+                parent = hash_algo(b'commit %d\0' % len(content) + content).hexdigest()
+                expected.append(parent)
+            
+            output = self._run_git_command(['git', 'hash-object', '-t', 'commit', '-w', '--stdin-paths'], cwd=work_dir,
+                                           check_output=True, input_data=''.join('%s\n' % p for p in paths).encode('utf-8'))
+            if output.split() != expected:
+                raise Exception("Rewritten commit ids do not match the ids git wrote")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        if expected:
+            self._run_git_command(['git', 'update-ref', '--no-deref', 'HEAD', expected[-1]], cwd=work_dir)
+        self.logger.info("Added original SHAs to %d commit messages", len(expected))
+
+    def _quit_cherry_pick(self, work_dir):
+        """Forget a failed cherry-pick without restoring the work tree
         
-        For LFS files, returns the pointer file size since only the pointer
-        is stored in Git repository and affects push/pull limits.
+        Only the sequencer state has to go. The next branch synced in this work
+        directory starts with 'checkout --force' and 'clean -fdx' anyway, which
+        discard the files the cherry-pick left behind.
         """
-        if not os.path.exists(file_path):
-            return 0
+        try:
+            self._run_git_command(['git', 'cherry-pick', '--quit'], cwd=work_dir)
+        except GitCommandError as e:
+            self.logger.debug("Failed to quit cherry-pick: %s", str(e))
+
+    def _calculate_changes_size(self, repo_dir, from_commit=None, to_commit=None):
+        """Calculate total size in MB of the changed files (all tracked files without from_commit)
         
-        # For both LFS pointer files and regular files, use the actual file size on disk
-        # LFS pointer files are small (~200-500 bytes) which is what gets pushed to Git
-        return self._get_file_size_mb(file_path)
-    
-    def _is_empty_repository(self, repo_dir):
-        """Check if repository is empty (no commits)"""
+        Sizes are the blob sizes git records, so LFS tracked files count with
+        their pointer size, which is what gets pushed to the Git repository.
+        The work tree is not read.
+        """
         try:
-            # Try to get HEAD commit - will fail if repository is empty
-            self._run_git_command('git rev-parse HEAD', cwd=repo_dir, check_output=True)
-            return False
-        except:
-            # If rev-parse HEAD fails, repository is empty
-            return True
+            batch = self._git_batch(repo_dir, check_only=True)
+            if from_commit:
+                # Plumbing tree-to-tree diff; -z keeps unusual file names intact. Computing numstat
+                # also fetches missing blobs of a partial clone in one go, before they are sized one by one
+                to_commit = to_commit or 'HEAD'
+                output = self._run_git_command(['git', 'diff-tree', '-r', '--numstat', '-z', from_commit, to_commit],
+                                               cwd=repo_dir, check_output=True, read_only=True)
+                specs = ('%s:%s' % (to_commit, path) for path in _iter_numstat_paths(output) if path)
+            else:
+                # Files of the checked out commit, as recorded in the index
+                specs = (oid for _, oid in self._iter_index_files(repo_dir))
+            
+            # Paths missing at to_commit (deleted) add nothing
+            total_bytes = 0
+            for spec in specs:
+                found = batch.get(spec)
+                if found and found[1] == 'blob':
+                    total_bytes += found[2]
+            
+            total_size = total_bytes / (1024.0 * 1024.0)
+            self.logger.info("Calculated changes size: %.2f MB", total_size)
+            return total_size
+        except Exception as e:
+            self.logger.debug("Failed to calculate changes size: %s", str(e))
+            return 0
     
     def sync_repository(self, repo):
         """Synchronize a single repository"""
-        self.log_info("=" * 60)
-        self.log_info("Starting synchronization for repository: %s" % repo.name)
+        self.logger.info("=" * 60)
+        self.logger.info("Starting synchronization for repository: %s", repo.name)
         
         repo_report = {
             'status': 'failed',
@@ -1055,116 +1648,112 @@ class GitSyncTool(object):
             sync_mode = 'full' if is_full_sync else 'incremental'
             repo_report['mode'] = sync_mode
             
-            self.log_info("Sync mode: %s" % sync_mode.upper())
+            self.logger.info("Sync mode: %s", sync_mode.upper())
             
             # Setup unified work directory for getting branches
             work_dir = os.path.join(repo.workspace_path, repo.name, 'sync_work')
             if not self._setup_unified_work_dir(work_dir, repo):
                 raise Exception("Failed to setup unified work directory")
             
-            # Fetch latest changes from source remote
-            self._run_git_command('git fetch source --prune', cwd=work_dir)
-            # Fetch all tags
-            self._run_git_command('git fetch source --tags', cwd=work_dir)
+            # Fetch source (branches and all tags) and destination at the same time, both are
+            # network bound. The origin fetch skips tag auto-following: destination tags are never
+            # read, and the two fetches then never lock the same ref
+            self.logger.info("Fetching latest changes from source and destination repositories")
+            source_fetch_cmd = ['git', 'fetch', '--prune', '--tags', 'source']
+            if is_full_sync and self._get_git_version() >= SOURCE_PARTIAL_FETCH_MIN_GIT_VERSION:
+                # A full sync would download every blob of the whole source history, fetch commits
+                # and trees only; blobs come on demand. git records the filter on the source remote,
+                # so later incremental fetches stay blob-less as well
+                source_fetch_cmd.append('--filter=blob:none')
+            fetch_cmds = [source_fetch_cmd, ['git', 'fetch', '--prune', '--no-tags', 'origin']]
+            self._run_parallel(lambda cmd: self._run_git_command(cmd, cwd=work_dir), fetch_cmds, len(fetch_cmds))
             
             # Get branches from source remote
             source_branches = self._get_branches(work_dir, remote_only=True, remote_prefix='source/')
             
             # Safety check: ensure source_branches is not None
             if source_branches is None:
-                self.log_error("Failed to get branches from source repository")
+                self.logger.error("Failed to get branches from source repository")
                 raise Exception("Cannot retrieve source branches")
             
-            self.log_info("Found %d branches in source repository" % len(source_branches))
+            self.logger.info("Found %d branches in source repository", len(source_branches))
             # Debug: Log the actual branch names retrieved
-            self.log_debug("Source branches: %s" % ', '.join(source_branches))
+            self.logger.debug("Source branches: %s", ', '.join(source_branches))
             
             # Filter branches
             branches_to_sync = []
             ignored_branches = []
             for branch in source_branches:
-                if self._should_ignore_branch(branch, repo.ignore_branches):
+                if self._should_ignore_branch(branch, repo.ignore_pattern):
                     ignored_branches.append(branch)
-                    self.log_info("Ignoring branch: %s" % branch)
+                    self.logger.info("Ignoring branch: %s", branch)
                     continue
                 branches_to_sync.append(branch)
             
             # Record ignored branches in report
             repo_report['ignored_branches'] = ignored_branches
             
-            self.log_info("Will sync %d branches (after filtering)" % len(branches_to_sync))
-            
-            # Fetch latest changes from both remotes once for all branches
-            self.log_info("Fetching latest changes from destination repositories")
-            self._run_git_command('git fetch origin --prune', cwd=work_dir)
+            self.logger.info("Will sync %d branches (after filtering)", len(branches_to_sync))
             
             # Snapshot last_commits so partial step-by-step progress can be persisted on failure
             initial_last_commits = dict(sync_state.get('last_commits') or {})
 
-            # Sync each branch
+            # Sync branches, in parallel when several work trees are available
+            branch_jobs = self.config.branch_jobs or min(8, len(branches_to_sync))
+            branch_work_dirs = self._setup_branch_work_dirs(repo, work_dir, branch_jobs, branches_to_sync)
+            if len(branch_work_dirs) > 1:
+                self.logger.info("Synchronizing up to %d branches in parallel", len(branch_work_dirs))
+            local_refs = self._load_commit_info_cache(branch_work_dirs, ['refs/remotes/source/', 'refs/heads/'])
+            self._delete_local_branches(work_dir, local_refs)
+            
+            # Each running branch sync holds one work tree, git refuses concurrent writes to a single one
+            free_work_dirs = queue.Queue()
+            for branch_work_dir in branch_work_dirs:
+                free_work_dirs.put(branch_work_dir)
+            
+            # Branch results waiting to be pushed together, see _push_pending_branches
+            pending_pushes = []
+            
+            def sync_one_branch(branch):
+                branch_work_dir = free_work_dirs.get()
+                try:
+                    return self._sync_branch_safe(repo, branch, is_full_sync, sync_state, branch_work_dir, pending_pushes)
+                finally:
+                    free_work_dirs.put(branch_work_dir)
+            
+            results = self._run_parallel(sync_one_branch, branches_to_sync, len(branch_work_dirs))
+            
+            # One push for all pending branches and the tags
+            pushed_branches = self._push_pending_branches(work_dir, sync_state, pending_pushes)
+            
+            # Aggregate results in branch order
             synced_count = 0
             skipped_count = 0
             new_branches_count = 0
             failed_count = 0
-            
-            for branch in branches_to_sync:
-                try:
-                    mapped_branch = self._map_branch_name(branch, repo.branch_map)
-                    self.log_info("Syncing branch: %s -> %s" % (branch, mapped_branch))
-                    # Debug: Log branch mapping details
-                    if branch != mapped_branch:
-                        self.log_debug("Branch mapping applied: '%s' mapped to '%s'" % (branch, mapped_branch))
-                    else:
-                        self.log_debug("No branch mapping for '%s', using original name" % branch)
-                    
-                    # Check if this is a new branch or mapping changed
-                    is_new_branch = branch not in sync_state['synced_branches']
-                    mapping_changed = (branch in sync_state['synced_branches'] and 
-                                     sync_state['synced_branches'][branch] != mapped_branch)
-                    
-                    if is_new_branch:
-                        new_branches_count += 1
-                        self.log_info("New branch detected: %s" % branch)
-                    elif mapping_changed:
-                        new_branches_count += 1
-                        self.log_info("Branch mapping changed: %s (%s -> %s)" % 
-                                    (branch, sync_state['synced_branches'][branch], mapped_branch))
-                    
-                    # Perform branch sync
-                    sync_result = self._sync_branch(repo, branch, mapped_branch, is_full_sync or is_new_branch or mapping_changed, sync_state)
-                    if sync_result == 'synced':
-                        synced_count += 1
-                        sync_state['synced_branches'][branch] = mapped_branch
-                    elif sync_result == 'skipped':
-                        skipped_count += 1
-                    elif sync_result == 'failed':
-                        failed_count += 1
-                        self.log_error("Branch %s synchronization failed" % branch)
-
-                except Exception as e:
-                    import traceback
-                    error_details = traceback.format_exc()
-                    self.log_error("Failed to sync branch %s: %s" % (branch, str(e)))
-                    self.log_error("Full traceback:\n%s" % error_details)
-                    continue
-            
-            try:
-                # push all tags at once
-                self.log_info("pushing all tags")
-                self._run_git_command('git push origin --tags', cwd=work_dir)
-            except Exception as push_error:
-                self.log_warn("Failed to push tags: %s" % str(push_error))
+            for branch, (mapped_branch, sync_result, is_new) in zip(branches_to_sync, results):
+                if sync_result == 'pending':
+                    sync_result = 'synced' if mapped_branch in pushed_branches else 'failed'
+                if is_new:
+                    new_branches_count += 1
+                if sync_result == 'synced':
+                    synced_count += 1
+                    sync_state['synced_branches'][branch] = mapped_branch
+                elif sync_result == 'skipped':
+                    skipped_count += 1
+                elif sync_result == 'failed':
+                    failed_count += 1
             
             # Update sync state after successful syncs, or persist partial commit progress
             if synced_count > 0:
                 sync_state['last_sync'] = datetime.now().isoformat()
                 self._save_sync_state(repo, sync_state)
-                self.log_info("Sync state updated with new timestamp")
+                self.logger.info("Sync state updated with new timestamp")
             elif sync_state.get('last_commits') != initial_last_commits:
                 self._save_sync_state(repo, sync_state)
-                self.log_info("Sync state saved with partial commit progress after failure")
+                self.logger.info("Sync state saved with partial commit progress after failure")
             else:
-                self.log_info("No branches synced, sync state unchanged")
+                self.logger.info("No branches synced, sync state unchanged")
             
             # Update report
             # Set status based on whether there were any failures
@@ -1180,92 +1769,177 @@ class GitSyncTool(object):
             repo_report['end_time'] = datetime.now().isoformat()
             
             if failed_count > 0:
-                self.log_info("Repository '%s' synchronized with failures!" % repo.name)
-                self.log_info("Branches synced: %d, Skipped: %d, New branches: %d, Failed: %d" % (synced_count, skipped_count, new_branches_count, failed_count))
+                self.logger.info("Repository '%s' synchronized with failures!", repo.name)
+                self.logger.info("Branches synced: %d, Skipped: %d, New branches: %d, Failed: %d", synced_count, skipped_count, new_branches_count, failed_count)
             else:
-                self.log_info("Repository '%s' synchronized successfully!" % repo.name)
-                self.log_info("Branches synced: %d, Skipped: %d, New branches: %d" % (synced_count, skipped_count, new_branches_count))
+                self.logger.info("Repository '%s' synchronized successfully!", repo.name)
+                self.logger.info("Branches synced: %d, Skipped: %d, New branches: %d", synced_count, skipped_count, new_branches_count)
             
         except Exception as e:
             import traceback
             error_details = traceback.format_exc()
             repo_report['error'] = str(e)
-            self.log_error("Failed to sync repository '%s': %s" % (repo.name, str(e)))
-            self.log_error("Full traceback:\n%s" % error_details)
+            self.logger.error("Failed to sync repository '%s': %s", repo.name, str(e))
+            self.logger.error("Full traceback:\n%s", error_details)
         
-        self.report['repositories'][repo.name] = repo_report
+        with self._report_lock:
+            self.report['repositories'][repo.name] = repo_report
         return repo_report['status'] == 'success'
     
-    def _sync_branch(self, repo, source_branch, dest_branch, is_full_sync, sync_state):
-        """Synchronize a single branch"""
+    def _setup_branch_work_dirs(self, repo, work_dir, count, branches):
+        """Get up to count work trees for parallel branch syncs
+        
+        The unified work directory is the first one, the others are detached
+        'git worktree' checkouts under <workspace>/<name>/sync_worktrees that
+        share its objects and refs. They are kept for reuse by later runs.
+        """
+        # More work trees than branches would only sit idle
+        count = min(count, len(branches))
+        if count <= 1 or self._get_git_version() < WORKTREE_MIN_GIT_VERSION:
+            return [work_dir]
+        
+        worktree_root = os.path.join(repo.workspace_path, repo.name, 'sync_worktrees')
+        try:
+            # Forget work trees whose directories are gone, then list the ones still registered
+            self._run_git_command(['git', 'worktree', 'prune'], cwd=work_dir)
+            output = self._run_git_command(['git', 'worktree', 'list', '--porcelain'], cwd=work_dir, check_output=True)
+            registered = set(os.path.realpath(line[len('worktree '):])
+                             for line in output.splitlines() if line.startswith('worktree '))
+            
+            # Any source branch tip works as start point, each branch sync checks out what it needs
+            start_ref = 'refs/remotes/source/%s' % branches[0]
+            work_dirs = [work_dir]
+            for index in range(1, count):
+                path = os.path.join(worktree_root, 'wt-%d' % index)
+                if os.path.realpath(path) not in registered:
+                    if os.path.exists(path):
+                        # Left over from a work directory that was recreated
+                        shutil.rmtree(path)
+                    self._run_git_command(['git', 'worktree', 'add', '--detach', '--no-checkout', path, start_ref], cwd=work_dir)
+                work_dirs.append(path)
+            return work_dirs
+        except Exception as e:
+            self.logger.warning("Failed to set up work trees for parallel branch sync, syncing serially: %s", str(e))
+            return [work_dir]
+    
+    def _sync_branch_safe(self, repo, branch, is_full_sync, sync_state, work_dir, pending_pushes):
+        """Sync one source branch in work_dir
+        
+        Returns (mapped_branch, result, is_new) where result is 'synced', 'skipped',
+        'pending' (queued in pending_pushes), 'failed' or None after an unexpected
+        error, and is_new tells whether the branch is new or its mapping changed.
+        """
+        mapped_branch = branch
+        is_new = False
+        try:
+            mapped_branch = self._map_branch_name(branch, repo.branch_map)
+            self.logger.info("Syncing branch: %s -> %s", branch, mapped_branch)
+            # Debug: Log branch mapping details
+            if branch != mapped_branch:
+                self.logger.debug("Branch mapping applied: '%s' mapped to '%s'", branch, mapped_branch)
+            else:
+                self.logger.debug("No branch mapping for '%s', using original name", branch)
+            
+            # Check if this is a new branch or mapping changed
+            is_new_branch = branch not in sync_state['synced_branches']
+            mapping_changed = (branch in sync_state['synced_branches'] and 
+                             sync_state['synced_branches'][branch] != mapped_branch)
+            
+            if is_new_branch:
+                is_new = True
+                self.logger.info("New branch detected: %s", branch)
+            elif mapping_changed:
+                is_new = True
+                self.logger.info("Branch mapping changed: %s (%s -> %s)",
+                                 branch, sync_state['synced_branches'][branch], mapped_branch)
+            
+            # Perform branch sync
+            sync_result = self._sync_branch(repo, branch, mapped_branch, is_full_sync or is_new_branch or mapping_changed, sync_state, work_dir,
+                                            pending_pushes)
+            if sync_result == 'failed':
+                self.logger.error("Branch %s synchronization failed", branch)
+            return mapped_branch, sync_result, is_new
+
+        except Exception as e:
+            import traceback
+            error_details = traceback.format_exc()
+            self.logger.error("Failed to sync branch %s: %s", branch, str(e))
+            self.logger.error("Full traceback:\n%s", error_details)
+            return mapped_branch, None, is_new
+    
+    def _sync_branch(self, repo, source_branch, dest_branch, is_full_sync, sync_state, work_dir, pending_pushes):
+        """Synchronize a single branch in work_dir (the unified work directory or one of its work trees)
+        
+        The branch is built on a detached HEAD, so syncs running in other work trees
+        never collide on local branch names. Step-by-step syncs push the branch
+        themselves, commit by commit or in chunks; otherwise the resulting commit
+        is queued in pending_pushes and 'pending' is returned, sync_repository
+        pushes all queued branches at once.
+        """
         try:
             state_key = '%s->%s' % (source_branch, dest_branch) if source_branch != dest_branch else source_branch
 
-            # Use unified working directory (already set up at repository level)
-            work_dir = os.path.join(repo.workspace_path, repo.name, 'sync_work')
-            
             # Debug: Log the actual branch names being used
-            self.log_info("Syncing: source_branch='%s' -> dest_branch='%s'" % (source_branch, dest_branch))
+            self.logger.info("Syncing: source_branch='%s' -> dest_branch='%s'", source_branch, dest_branch)
             
-            # Get source commit info from unified work directory
-            source_commit = self._get_commit_info(work_dir, source_branch, remote_name='source')
-            if not source_commit:
-                self.log_error("Cannot get commit info for branch: %s" % source_branch)
+            # Only the source commit hash is needed to decide whether the branch is up to date
+            source_hash = self._get_commit_hash(work_dir, source_branch, remote_name='source')
+            if not source_hash:
+                self.logger.error("Cannot get commit info for branch: %s", source_branch)
                 return 'failed'
             
             # Check if we need to sync (for incremental mode)
             # Safety check: ensure sync_state structure is valid
             if not sync_state or 'last_commits' not in sync_state or sync_state['last_commits'] is None:
-                self.log_warn("Invalid sync state structure, treating as first sync")
+                self.logger.warning("Invalid sync state structure, treating as first sync")
                 last_synced_commit = None
             elif is_full_sync:
                 last_synced_commit = None
             else:
                 last_synced_commit = sync_state['last_commits'].get(state_key)
             
-            if last_synced_commit and last_synced_commit == source_commit['hash']:
-                self.log_info("Branch %s is up to date, skipping" % source_branch)
+            if last_synced_commit and last_synced_commit == source_hash:
+                self.logger.info("Branch %s is up to date, skipping", source_branch)
                 return 'skipped'
             
+            # Branch needs syncing, get the full commit info (author, subject) as well
+            source_commit = self._get_commit_info(work_dir, source_branch, remote_name='source')
+            if not source_commit:
+                self.logger.error("Cannot get commit info for branch: %s", source_branch)
+                return 'failed'
+            
             # Initialize add_original_hash parameter based on dest branch consistency
-            repo.add_original_hash = False  # Default to False
+            add_original_hash = False  # Default to False
             
             # Check if dest branch's last commit matches sync state commit
             try:
-                # First check if destination branch exists in origin
-                self._run_git_command('git show-ref --verify refs/remotes/origin/%s' % dest_branch, cwd=work_dir, check_output=True)
-                
-                # Get current HEAD of destination branch
-                dest_head_cmd = 'git rev-parse origin/%s' % dest_branch
-                dest_head = self._run_git_command(dest_head_cmd, cwd=work_dir, check_output=True).strip()
-                
-                # Compare with sync state commit
-                if last_synced_commit and dest_head != last_synced_commit:
-                    # Dest branch has diverged from sync state, need to add original hash
-                    repo.add_original_hash = True
-                    self.log_info("Dest branch has diverged from sync state, will add original hash to commit messages")
-                else:
-                    self.log_info("Dest branch is consistent with sync state, will preserve original commit messages")
+                # Get current HEAD of destination branch, None if it doesn't exist in origin
+                dest_head = self._resolve_rev(work_dir, 'refs/remotes/origin/%s' % dest_branch)
             except Exception as e:
+                self.logger.debug("Could not resolve origin/%s: %s", dest_branch, str(e))
+                dest_head = None
+            
+            if dest_head is None:
                 # Dest branch doesn't exist or can't be determined - this is likely a new branch
-                repo.add_original_hash = False
-                self.log_info("Dest branch does not exist or cannot be determined, treating as new branch - will preserve original commit messages")
+                self.logger.info("Dest branch does not exist or cannot be determined, treating as new branch - will preserve original commit messages")
+            elif last_synced_commit and dest_head != last_synced_commit:
+                # Dest branch has diverged from sync state, need to add original hash
+                add_original_hash = True
+                self.logger.info("Dest branch has diverged from sync state, will add original hash to commit messages")
+            else:
+                self.logger.info("Dest branch is consistent with sync state, will preserve original commit messages")
+            
+            # None: pushed step by step already, otherwise queue HEAD with or without force
+            push_force = None
             
             try:
-                # Check if destination repository is empty
-                is_empty_repo = self._is_empty_repository(work_dir)
-                
                 # Handle different sync scenarios
                 if repo.clean_history:
-                    # Full sync with clean history - create orphan branch
-                    self.log_info("Performing full sync with clean history for branch: %s" % dest_branch)
-                    
-                    # Create orphan branch
-                    self._run_git_command('git checkout --orphan temp_clean', cwd=work_dir)
-                    self._run_git_command('git rm -rf .', cwd=work_dir)
+                    # Full sync with clean history - a single parentless commit
+                    self.logger.info("Performing full sync with clean history for branch: %s", dest_branch)
                     
                     # Copy files from source branch
-                    self._run_git_command('git checkout %s -- .' % source_commit['hash'], cwd=work_dir)
+                    self._run_git_command(['git', 'checkout', '--force', '--detach', source_commit['hash']], cwd=work_dir)
                     
                     # Check for large files and setup LFS if needed (auto-enable if required)
                     self._check_and_setup_lfs(work_dir, repo)
@@ -1273,119 +1947,48 @@ class GitSyncTool(object):
                     # Commit with appropriate message
                     commit_message = "[SYNC] %s\n\nOriginal SHA: %s" % (source_commit['message'], source_commit['hash'])
                     
-                    self._run_git_command('git add .', cwd=work_dir)
-                    self._run_git_command('git commit -m "%s"' % commit_message.replace('"', '\"'), cwd=work_dir)
-                    
-                    # Replace original branch
-                    self._run_git_command('git branch -D "%s"' % dest_branch, cwd=work_dir)
-                    self._run_git_command('git branch -m temp_clean "%s"' % dest_branch, cwd=work_dir)
+                    # Create a parentless commit of the tree and move the detached HEAD onto it
+                    self._run_git_command(['git', 'add', '.'], cwd=work_dir)
+                    tree_sha = self._run_git_command(['git', 'write-tree'], cwd=work_dir, check_output=True)
+                    clean_commit = self._run_git_command(['git', 'commit-tree', tree_sha, '-m', commit_message], cwd=work_dir, check_output=True)
+                    self._run_git_command(['git', 'update-ref', '--no-deref', 'HEAD', clean_commit], cwd=work_dir)
                     
-                    # Push clean history to destination repository
-                    try:
-                        self._run_git_command('git push origin "%s" --force' % dest_branch, cwd=work_dir)
-                    except Exception as push_error:
-                        self.log_error("Failed to push clean history for branch %s: %s" % (dest_branch, str(push_error)))
-                        return 'failed'
+                    # Clean history replaces the destination branch
+                    push_force = True
                     
                 else:
                     # Incremental sync or full sync without clean history
                     if is_full_sync:
-                        self.log_info("Performing full sync (preserve history) for branch: %s" % dest_branch)
-
-                        # Delete local branch if it exists
-                        try:
-                            self._run_git_command('git branch -D "%s"' % dest_branch, cwd=work_dir, check_output=True)
-                        except:
-                            pass
-
-                        # Delete remote branch if it exists
-                        try:
-                            self._run_git_command('git branch -d -r "%s"' % dest_branch, cwd=work_dir, check_output=True)
-                        except:
-                            pass
-
+                        self.logger.info("Performing full sync (preserve history) for branch: %s", dest_branch)
                     else:
-                        self.log_info("Performing incremental sync for branch: %s" % dest_branch)
+                        self.logger.info("Performing incremental sync for branch: %s", dest_branch)
                     
                     # For existing repository, perform cherry-pick based sync
-                    self.log_info("Syncing branch %s using cherry-pick strategy" % dest_branch)
+                    self.logger.info("Syncing branch %s using cherry-pick strategy", dest_branch)
                     
-                    # Clean working directory to avoid checkout conflicts
-                    try:
-                        # Check if HEAD exists before trying to reset
-                        self._run_git_command('git rev-parse --verify HEAD', cwd=work_dir, check_output=True)
-                        # HEAD exists, safe to reset
-                        self._run_git_command('git reset --hard HEAD', cwd=work_dir)
-                        self.log_debug("Reset working directory to HEAD")
-                    except Exception as reset_error:
-                        self.log_debug("HEAD not found or reset failed (likely empty repo): %s" % str(reset_error))
-                        pass
-
-                    try:
-                        # Clean untracked files and directories
-                        self._run_git_command('git clean -fdx', cwd=work_dir)
-                        self.log_debug("Cleaned untracked files from working directory")
-                    except Exception as clean_error:
-                        self.log_debug("Clean untracked files failed: %s" % str(clean_error))
-                        pass
-
-                    # Ensure we're on the correct destination branch
-                    try:
-                        # Check if destination branch exists in origin
-                        self._run_git_command('git show-ref --verify "refs/remotes/origin/%s"' % dest_branch, cwd=work_dir, check_output=True)
-                        # Origin branch exists, check if local branch exists
-                        try:
-                            self._run_git_command('git show-ref --verify "refs/heads/%s"' % dest_branch, cwd=work_dir, check_output=True)
-                            # Local branch exists, switch and reset to origin
-                            self._run_git_command('git checkout --force "%s"' % dest_branch, cwd=work_dir)
-                            self._run_git_command('git reset --hard "origin/%s"' % dest_branch, cwd=work_dir)
-                            self.log_info("Switched to existing local branch %s and reset to origin" % dest_branch)
-                        except:
-                            # Local branch doesn't exist, create from origin
-                            self._run_git_command('git checkout --force -b "%s" "origin/%s"' % (dest_branch, dest_branch), cwd=work_dir)
-                            self.log_info("Created local branch %s from origin/%s" % (dest_branch, dest_branch))
-                    except:
-                        # Origin branch doesn't exist, create new branch from source
+                    # Check out the destination branch state on a detached HEAD; --force discards
+                    # local changes left by the previous branch synced in this work directory
+                    if dest_head is None:
+                        # Origin branch doesn't exist, start the new branch from source
                         try:
-                        # Get current branch name (handle empty repository case)
-                            has_rename = False
-                            try:
-                                current_branch = self._run_git_command('git rev-parse --abbrev-ref HEAD', cwd=work_dir, check_output=True).strip()
-                            except Exception as head_error:
-                                # Handle empty repository or invalid HEAD case
-                                self.log_debug("Cannot get current branch (likely empty repo): %s" % str(head_error))
-                                current_branch = None
-                            if current_branch and current_branch == dest_branch:
-                                # Rename current branch to temp if it's the same as dest_branch
-                                self._run_git_command('git branch -m temp', cwd=work_dir)
-                                has_rename = True
-                                self.log_info("Renamed current branch %s to temp" % dest_branch)
-                            else:
-                                # Delete local branch if it exists (skip if empty repo)
-                                if current_branch:  # Only try to delete if we have a valid current branch
-                                    try:
-                                        self._run_git_command('git branch -D "%s"' % dest_branch, cwd=work_dir, check_output=True)
-                                    except:
-                                        pass
-                                else:
-                                    self.log_debug("Skipping branch deletion in empty repository")
-
-                            self._run_git_command('git checkout --force -b "%s" "source/%s"' % (dest_branch, source_branch), cwd=work_dir)
-                            self._run_git_command('git reset --hard "%s"' % source_commit['hash'], cwd=work_dir)
-                            self.log_info("Created new branch %s from source/%s" % (dest_branch, source_branch))
-
-                            if has_rename:
-                                # Delete temp branch if it exists
-                                try:
-                                    self._run_git_command('git branch -D temp', cwd=work_dir, check_output=True)
-                                except:
-                                    pass
+                            self._run_git_command(['git', 'checkout', '--force', '--detach', source_commit['hash']], cwd=work_dir)
+                            self.logger.info("Starting new branch %s from source/%s", dest_branch, source_branch)
 
                             # Update is_full_sync flag
                             is_full_sync = True
                         except Exception as e:
-                            self.log_error("Failed to create branch %s: %s" % (dest_branch, str(e)))
+                            self.logger.error("Failed to create branch %s: %s", dest_branch, str(e))
                             return 'failed'
+                    else:
+                        self._run_git_command(['git', 'checkout', '--force', '--detach', 'refs/remotes/origin/%s' % dest_branch], cwd=work_dir)
+                        self.logger.info("Checked out origin/%s", dest_branch)
+
+                    try:
+                        # Remove untracked files left by the previous branch, the checkout kept them
+                        self._run_git_command(['git', 'clean', '-fdx'], cwd=work_dir)
+                        self.logger.debug("Cleaned untracked files from working directory")
+                    except Exception as clean_error:
+                        self.logger.debug("Clean untracked files failed: %s", str(clean_error))
                     
                     # Check total size of changes
                     if is_full_sync:
@@ -1399,10 +2002,12 @@ class GitSyncTool(object):
                         total_size = self._calculate_changes_size(work_dir)
 
                     if total_size > repo.lfs_threshold:
-                        # Split into individual commits (each commit is pushed individually)
-                        self.log_info("Large changes detected (%.2f MB), syncing commit by commit" % total_size)
-                        if not self._sync_step_by_step(work_dir, repo, source_branch, last_synced_commit, source_commit['hash'], is_full_sync, sync_state, state_key):
-                            return 'failed'
+                        # Split the range, the branch is pushed in steps instead of in one large push
+                        self.logger.info("Large changes detected (%.2f MB), syncing step by step", total_size)
+                        step_status = self._sync_step_by_step(work_dir, repo, source_branch, dest_branch, last_synced_commit, source_commit['hash'],
+                                                              is_full_sync, sync_state, state_key, add_original_hash)
+                        if step_status != 'synced':
+                            return step_status
                     else:
                         if is_full_sync:
                             # Full sync: check all files
@@ -1417,117 +2022,157 @@ class GitSyncTool(object):
                                 if last_synced_commit:
                                     # Get list of commits to cherry-pick
                                     commits_output = self._run_git_command(
-                                        'git rev-list --reverse %s..%s' % (last_synced_commit, source_commit['hash']),
-                                        cwd=work_dir, check_output=True)
-                                    commits = [c.strip() for c in commits_output.strip().split('\n') if c.strip()]
-                                    self.log_info("Cherry-picking %d commits" % len(commits))
+                                        ['git', 'rev-list', '--reverse', '%s..%s' % (last_synced_commit, source_commit['hash'])],
+                                        cwd=work_dir, check_output=True, read_only=True)
+                                    commits = [c.strip() for c in commits_output.splitlines() if c.strip()]
+                                    self.logger.info("Cherry-picking %d commits", len(commits))
                                     for c in commits:
                                         self._cherry_pick_one(work_dir, c)
                                 elif not is_full_sync:
                                     # Check if this commit already exists in current branch
                                     try:
-                                        current_head = self._run_git_command('git rev-parse HEAD', cwd=work_dir, check_output=True).strip()
+                                        current_head = self._read_head(work_dir)
                                         if current_head == source_commit['hash']:
-                                            self.log_info("Branch is already up to date, no commits to cherry-pick")
+                                            self.logger.info("Branch is already up to date, no commits to cherry-pick")
                                         else:
                                             self._cherry_pick_one(work_dir, source_commit['hash'])
                                     except Exception as e:
                                         # If we can't get HEAD, continue with cherry-pick
-                                        self.log_error("Failed to get HEAD, continue with cherry-pick: %s" % str(e))
+                                        self.logger.error("Failed to get HEAD, continue with cherry-pick: %s", str(e))
                                         pass
                             except Exception as e:
-                                try:
-                                    self.log_error("Failed to cherry-pick commits: %s" % str(e))
-                                    self._run_git_command('git cherry-pick --abort', cwd=work_dir)
-                                except:
-                                    # If abort fails, try to reset to clean state
-                                    try:
-                                        self._run_git_command('git reset --hard HEAD', cwd=work_dir)
-                                        self._run_git_command('git clean -fd', cwd=work_dir)
-                                        self.log_info("Reset to clean state after cherry-pick failure")
-                                    except:
-                                        pass
-
+                                self.logger.error("Failed to cherry-pick commits: %s", str(e))
+                                self._quit_cherry_pick(work_dir)
                                 return 'failed'
                         
-                            # Push batch changes to destination repository
-                            try:
-                                if is_full_sync:
-                                    self._run_git_command('git push origin "%s" --force' % dest_branch, cwd=work_dir)
-                                else:
-                                    self._run_git_command('git push origin "%s"' % dest_branch, cwd=work_dir)
-                            except Exception as push_error:
-                                self.log_error("Failed to push branch %s: %s" % (dest_branch, str(push_error)))
-                                return 'failed'
+                            # Push batch changes to destination repository with the other branches
+                            push_force = is_full_sync
 
                         else:
-                            if not self._sync_step_by_step(work_dir, repo, source_branch, last_synced_commit, source_commit['hash'], is_full_sync, sync_state, state_key):
-                                return 'failed'
-
+                            step_status = self._sync_step_by_step(work_dir, repo, source_branch, dest_branch, last_synced_commit, source_commit['hash'],
+                                                                  is_full_sync, sync_state, state_key, add_original_hash)
+                            if step_status != 'synced':
+                                return step_status
+
+                if push_force is not None:
+                    # The work tree moves on to the next branch, queue the commit itself
+                    pending_pushes.append({
+                        'source_branch': source_branch,
+                        'dest_branch': dest_branch,
+                        'commit': self._read_head(work_dir),
+                        'force': push_force,
+                        'state_key': state_key,
+                        'source_commit': source_commit['hash']
+                    })
+                    return 'pending'
+                
                 # Update sync state only after successful push
                 sync_state['last_commits'][state_key] = source_commit['hash']
                 
-                self.log_info("Branch %s -> %s synchronized successfully" % (source_branch, dest_branch))
+                self.logger.info("Branch %s -> %s synchronized successfully", source_branch, dest_branch)
                 return 'synced'
                 
             except Exception as e:
-                self.log_error("Failed to sync branch %s: %s" % (source_branch, str(e)))
+                self.logger.error("Failed to sync branch %s: %s", source_branch, str(e))
                 return 'failed'
 
         except Exception as e:
-            self.log_error("Failed to sync branch %s: %s" % (source_branch, str(e)))
+            self.logger.error("Failed to sync branch %s: %s", source_branch, str(e))
             return 'failed'
 
-    _BINARY_EXTS = {'.tar', '.gz', '.zip', '.jar', '.dll', '.so', '.lib', '.exe'}
+    def _push_pending_branches(self, work_dir, sync_state, pending_pushes):
+        """Push all queued branches and the tags with a single 'git push'
+        
+        Forced branches use a '+' refspec. Per-ref results are read from
+        --porcelain output, so one rejected ref does not fail the others;
+        sync state is updated for pushed branches only.
+        
+        Returns the set of destination branches that were pushed.
+        """
+        self.logger.info("Pushing %d branches and all tags", len(pending_pushes))
+        push_cmd = ['git', 'push', '--porcelain', 'origin', '--tags']
+        for pending in pending_pushes:
+            push_cmd.append('%s%s:refs/heads/%s' % ('+' if pending['force'] else '', pending['commit'], pending['dest_branch']))
+        
+        push_error = None
+        try:
+            output = self._run_git_command(push_cmd, cwd=work_dir, check_output=True)
+        except GitCommandError as e:
+            push_error = e
+            output = e.output or ''
+            self.logger.debug("Push reported errors: %s", str(e))
+        
+        # Porcelain lines: "<flag>\t<src>:<dst>\t<summary>", flag '!' marks a rejected ref
+        ref_status = {}
+        for line in output.splitlines():
+            fields = line.split('\t')
+            if len(fields) >= 3 and len(fields[0]) == 1:
+                ref_status[fields[1].rpartition(':')[2]] = (fields[0], fields[2])
+        
+        # Without any ref result the push failed as a whole (auth, network, hook), that error is
+        # what every branch failed on
+        unpushed_summary = 'no result from push'
+        if push_error is not None and not ref_status:
+            self.logger.error("Failed to push branches and tags: %s", str(push_error))
+            # git's first "fatal:" or "error:" line names the cause
+            error_lines = [line for line in output.splitlines() if line.startswith(('fatal:', 'error:'))]
+            unpushed_summary = error_lines[0] if error_lines else str(push_error)
+        
+        failed_tags = [ref for ref, (flag, _) in ref_status.items() if flag == '!' and ref.startswith('refs/tags/')]
+        if failed_tags:
+            self.logger.warning("Failed to push tags: %s", ', '.join(sorted(failed_tags)))
+        
+        pushed = set()
+        for pending in pending_pushes:
+            flag, summary = ref_status.get('refs/heads/%s' % pending['dest_branch'], ('!', unpushed_summary))
+            if flag == '!':
+                self.logger.error("Failed to push branch %s: %s", pending['dest_branch'], summary)
+                continue
+            # Update sync state only after successful push
+            sync_state['last_commits'][pending['state_key']] = pending['source_commit']
+            pushed.add(pending['dest_branch'])
+            self.logger.info("Branch %s -> %s synchronized successfully", pending['source_branch'], pending['dest_branch'])
+        return pushed
 
     def _is_relevant_file(self, rel_path):
         """
         Check if a file is relevant for sync.
         """
-        _, ext = os.path.splitext(rel_path.lower())
-        return ext in self._BINARY_EXTS
+        return _is_binary_file(rel_path)
 
     def _get_changed_files_between_refs(self, work_dir, from_ref, to_ref):
         """
         List files added, copied, modified or renamed between from_ref and to_ref.
         Returns paths relative to work_dir.
         """
-        # Build command as string to avoid list/unicode issues
-        cmd = 'git diff --diff-filter=ACMR --name-only "%s" "%s"' % (from_ref, to_ref)
+        cmd = ['git', 'diff', '--diff-filter=ACMR', '--name-only', from_ref, to_ref]
         try:
-            output = self._run_git_command(cmd, cwd=work_dir, check_output=True)
+            output = self._run_git_command(cmd, cwd=work_dir, check_output=True, read_only=True)
         except Exception as e:
-            self.log_error("Failed to list changed files: %s" % str(e))
+            self.logger.error("Failed to list changed files: %s", str(e))
             return []
 
         all_files = [line.strip() for line in output.splitlines() if line.strip()]
         return [f for f in all_files if self._is_relevant_file(f)]
 
-    def _get_blob_size_mb(self, work_dir, ref, rel_path):
+    def _get_blob_size(self, work_dir, ref, rel_path):
         """
-        Get the size in MB of the blob at ref:rel_path without checking it out.
+        Get the size in bytes of the blob at ref:rel_path without checking it out.
+        Returns None if the path does not exist at ref.
         """
         try:
-            cmd = 'git rev-parse "%s:%s"' % (ref, rel_path)
-            blob_id = self._run_git_command(cmd, cwd=work_dir, check_output=True).strip()
+            found = self._git_batch(work_dir, check_only=True).get('%s:%s' % (ref, rel_path))
         except Exception as e:
-            self.log_warn("Could not resolve blob for %s:%s: %s" % (ref, rel_path, str(e)))
-            return 0.0
-
-        try:
-            cmd = 'git cat-file -s "%s"' % blob_id
-            size_bytes = int(self._run_git_command(cmd, cwd=work_dir, check_output=True).strip())
-        except Exception as e:
-            self.log_warn("Could not get blob size for %s: %s" % (blob_id, str(e)))
-            return 0.0
+            self.logger.warning("Could not get blob size for %s:%s: %s", ref, rel_path, str(e))
+            return 0
 
-        return size_bytes / (1024.0 * 1024.0)
+        return found[2] if found else None
 
     def _check_and_setup_lfs(self, work_dir, repo, from_ref=None, to_ref="HEAD"):
         """
         Detect large files and configure Git LFS.
 
-        - Full-scan mode (from_ref is None): walk the working tree on disk.
+        - Full-scan mode (from_ref is None): check every file in the index.
         - Incremental mode (from_ref provided): list files changed
           between from_ref and to_ref (which can be any branch or commit).
         Returns True if LFS was initialized or patterns added; False otherwise.
@@ -1539,75 +2184,101 @@ class GitSyncTool(object):
             candidates = self._get_changed_files_between_refs(work_dir, from_ref, to_ref)
             mode = "Incremental (%s → %s)" % (from_ref, to_ref)
         else:
-            candidates = []
-            for root, _, files in os.walk(work_dir):
-                if ".git" in root:
-                    continue
-                for fn in files:
-                    rel = os.path.relpath(os.path.join(root, fn), work_dir)
-                    if self._is_relevant_file(rel):
-                        candidates.append(rel)
+            # Sizes come from the blobs the index records, the work tree is not scanned
+            batch = self._git_batch(work_dir, check_only=True)
+            file_sizes = {}
+            for rel, oid in self._iter_index_files(work_dir):
+                if self._is_relevant_file(rel):
+                    found = batch.get(oid)
+                    file_sizes[rel] = found[2] if found else 0
+            candidates = list(file_sizes)
             mode = "Full-scan"
 
-        self.log_info("Starting LFS check [%s], %d files" % (mode, len(candidates)))
+        self.logger.info("Starting LFS check [%s], %d files", mode, len(candidates))
 
-        # 2) Inspect each
+        # 2) Size check
+        large_files = []
         for rel in candidates:
             if from_ref:
-                # skip if doesn't exist at to_ref
-                cmd = 'git ls-tree --name-only "%s" -- "%s"' % (to_ref, rel)
-                exists = self._run_git_command(cmd, cwd=work_dir, check_output=True).strip()
-                if not exists:
-                    self.log_debug("Skipping removed: %s" % rel)
+                # The batch-check lookup reports paths missing at to_ref, skip those
+                size_bytes = self._get_blob_size(work_dir, to_ref, rel)
+                if size_bytes is None:
+                    self.logger.debug("Skipping removed: %s", rel)
                     continue
-                size_mb = self._get_blob_size_mb(work_dir, to_ref, rel)
             else:
-                abs_path = os.path.join(work_dir, rel)
-                if not os.path.exists(abs_path):
-                    self.log_debug("Skipping missing: %s" % rel)
-                    continue
-                size_mb = self._get_file_size_mb(abs_path)
+                size_bytes = file_sizes[rel]
 
-            # 3) Threshold check
-            if size_mb >= repo.lfs_file_threshold:
-                tracked = self._is_file_lfs_tracked(work_dir, rel)
-                status = "already LFS" if tracked else "will track"
-                self.log_info("Large file: %s (%.2f MB) – %s" % (rel, size_mb, status))
+            if self._should_use_lfs(size_bytes, repo.lfs_file_threshold_bytes):
+                large_files.append((rel, size_bytes))
 
-                if not lfs_needed:
-                    if not self._setup_lfs_for_repo(work_dir):
-                        self.log_error("LFS init failed, large files will commit normally")
-                        return False
-                    lfs_needed = True
+        # 3) Track large files, their current attributes come from one check-attr call
+        lfs_tracked = self._get_lfs_tracked_files(work_dir, [rel for rel, _ in large_files])
+        for rel, size_bytes in large_files:
+            tracked = rel in lfs_tracked
+            status = "already LFS" if tracked else "will track"
+            self.logger.info("Large file: %s (%.2f MB) – %s", rel, size_bytes / (1024.0 * 1024.0), status)
 
-                if not tracked:
-                    try:
-                        self._run_git_command('git lfs track "%s"' % rel, cwd=work_dir)
-                        self.log_info("Added LFS rule: %s" % rel)
-                    except Exception as e:
-                        self.log_warn("LFS track failed for %s: %s" % (rel, str(e)))
+            if not lfs_needed:
+                if not self._setup_lfs_for_repo(work_dir):
+                    self.logger.error("LFS init failed, large files will commit normally")
+                    return False
+                lfs_needed = True
+
+            if not tracked:
+                try:
+                    self._run_git_command(['git', 'lfs', 'track', rel], cwd=work_dir)
+                    self.logger.info("Added LFS rule: %s", rel)
+                except Exception as e:
+                    self.logger.warning("LFS track failed for %s: %s", rel, str(e))
 
         # 4) Stage .gitattributes if needed
         if lfs_needed:
             try:
-                self._run_git_command('git add .gitattributes', cwd=work_dir)
+                self._run_git_command(['git', 'add', '.gitattributes'], cwd=work_dir)
             except Exception as e:
-                self.log_warn("Failed to stage .gitattributes: %s" % str(e))
+                self.logger.warning("Failed to stage .gitattributes: %s", str(e))
 
         return lfs_needed
 
-    def _is_file_lfs_tracked(self, work_dir, file_path):
-        """Check if a file is already tracked by LFS"""
+    def _fetch_missing_range_objects(self, work_dir, range_spec):
+        """Fetch the objects of range_spec a partial clone lacks from source with one request
+        
+        --missing=print lists them as "?<oid>" instead of fetching each on demand,
+        as the blob size lookups of a step-by-step sync would. Pushing the range
+        needs these objects anyway.
+        """
+        if self._get_git_version() < FETCH_STDIN_MIN_GIT_VERSION:
+            # No 'git fetch --stdin', the lookups fetch missing blobs on demand
+            return
+        objects = self._git_stream(['git', 'rev-list', '--objects', '--missing=print', range_spec], cwd=work_dir, read_only=True)
         try:
-            # Use git check-attr to see if file has lfs filter
-            output = self._run_git_command('git check-attr filter "%s"' % file_path, cwd=work_dir, check_output=True)
-            # Output format: "file_path: filter: lfs" if tracked by LFS
-            return 'filter: lfs' in output
-        except:
-            # If command fails or file doesn't exist, assume not LFS tracked
-            return False
+            missing = [line[1:] for line in objects if line.startswith('?')]
+        finally:
+            objects.close()
+        if missing:
+            self.logger.info("Fetching %d missing objects of the range from source", len(missing))
+            self._run_git_command(['git', '-c', 'fetch.negotiationAlgorithm=noop', 'fetch', '--no-tags',
+                                   '--no-write-fetch-head', '--recurse-submodules=no', '--filter=blob:none',
+                                   '--stdin', 'source'], cwd=work_dir, check_output=True,
+                                  input_data=''.join('%s\n' % oid for oid in missing).encode('utf-8'))
+
+    def _get_lfs_tracked_files(self, work_dir, paths):
+        """Return the subset of paths already tracked by LFS, checked with a single git check-attr"""
+        if not paths:
+            return set()
+        try:
+            output = self._run_git_command(['git', 'check-attr', '-z', '--stdin', 'filter'], cwd=work_dir,
+                                           check_output=True, read_only=True,
+                                           input_data=''.join('%s\0' % p for p in paths).encode('utf-8'))
+        except GitCommandError:
+            # If the command fails, assume the files are not LFS tracked
+            return set()
+        # Output is "<path>\0filter\0<value>\0" per path, value "lfs" for LFS tracked files
+        fields = _iter_nul_fields(output)
+        return set(path for path, _, value in zip(fields, fields, fields) if value == 'lfs')
     
-    def _sync_single_commit(self, work_dir, repo, commit_hash, source_branch, force_push=False):
+    def _sync_single_commit(self, work_dir, repo, commit_hash, source_branch, dest_branch, force_push=False, add_original_hash=False,
+                            commit_subject=None):
         """Sync a single commit
         
         Args:
@@ -1615,71 +2286,87 @@ class GitSyncTool(object):
             repo: Repository configuration
             commit_hash: Hash of commit to sync
             source_branch: Source branch name
+            dest_branch: Destination branch the detached HEAD is pushed to
             force_push: Whether to use --force when pushing (default: False)
+            add_original_hash: Whether to add the original SHA to the commit message
+            commit_subject: Subject of the commit if already known, read from the commit otherwise
+        
+        Returns:
+            (success, add_original_hash) - the flag stays on for the following
+            commits once LFS rewrote a commit.
         """
         try:
             # Get current commit hash
-            current_commit = self._run_git_command('git rev-parse HEAD', cwd=work_dir, check_output=True).strip()
+            current_commit = self._read_head(work_dir)
 
             # Get commit info
-            commit_info = self._get_commit_info(work_dir, source_branch, commit_hash, remote_name='source')
-            if not commit_info:
-                self.log_error("Cannot get commit info for: %s" % commit_hash)
-                return False
+            if commit_subject is None:
+                commit_info = self._get_commit_info(work_dir, source_branch, commit_hash, remote_name='source')
+                if not commit_info:
+                    self.logger.error("Cannot get commit info for: %s", commit_hash)
+                    return False, add_original_hash
+                commit_subject = commit_info['message']
             
             # Cherry-pick the commit
             if current_commit != commit_hash:
                 self._cherry_pick_one(work_dir, commit_hash)
             
             # Check for large files and setup LFS if needed (auto-enable if required)
-            self.log_debug("Checking for large files and setup LFS if needed")
+            self.logger.debug("Checking for large files and setup LFS if needed")
             lfs_enabled = self._check_and_setup_lfs(work_dir, repo, current_commit)
-            self.log_debug("LFS enabled: %s" % lfs_enabled)
+            self.logger.debug("LFS enabled: %s", lfs_enabled)
 
             # Update commit message based on add_original_hash setting or LFS usage
-            if lfs_enabled or repo.add_original_hash:
+            if lfs_enabled or add_original_hash:
                 # LFS was enabled or hash addition is required, include original SHA
-                new_message = "[SYNC] %s\n\nOriginal SHA: %s" % (commit_info['message'], commit_hash)
-                self._run_git_command('git commit --amend -m "%s"' % new_message.replace('"', '\"'), cwd=work_dir)
-                repo.add_original_hash = True
-                self.log_debug("Updated commit message with original SHA")
+                new_message = "[SYNC] %s\n\nOriginal SHA: %s" % (commit_subject, commit_hash)
+                self._run_git_command(['git', 'commit', '--amend', '-m', new_message], cwd=work_dir)
+                add_original_hash = True
+                self.logger.debug("Updated commit message with original SHA")
             else:
                 # No LFS and no hash addition needed, keep original commit message and SHA unchanged
-                self.log_debug("Keeping original commit message and SHA")
+                self.logger.debug("Keeping original commit message and SHA")
             
             # Push individual commit to avoid large data transfer
             try:
                 if force_push:
-                    self._run_git_command('git push origin HEAD --force', cwd=work_dir)
-                    self.log_debug("Force pushed commit: %s" % commit_hash[:8])
+                    self._run_git_command(['git', 'push', 'origin', 'HEAD:refs/heads/%s' % dest_branch, '--force'], cwd=work_dir)
+                    self.logger.debug("Force pushed commit: %s", commit_hash[:8])
                 else:
-                    self._run_git_command('git push origin HEAD', cwd=work_dir)
-                    self.log_debug("Pushed commit: %s" % commit_hash[:8])
+                    self._run_git_command(['git', 'push', 'origin', 'HEAD:refs/heads/%s' % dest_branch], cwd=work_dir)
+                    self.logger.debug("Pushed commit: %s", commit_hash[:8])
             except Exception as push_error:
-                self.log_error("Failed to push commit %s: %s" % (commit_hash[:8], str(push_error)))
-                return False
+                self.logger.error("Failed to push commit %s: %s", commit_hash[:8], str(push_error))
+                return False, add_original_hash
             
-            self.log_debug("Synced and pushed commit: %s" % commit_hash[:8])
-            return True
+            self.logger.debug("Synced and pushed commit: %s", commit_hash[:8])
+            return True, add_original_hash
             
         except Exception as e:
-            self.log_error("Failed to sync commit %s: %s" % (commit_hash, str(e)))
-            return False
+            self.logger.error("Failed to sync commit %s: %s", commit_hash, str(e))
+            return False, add_original_hash
 
-    def _sync_step_by_step(self, work_dir, repo, source_branch, last_synced_commit, to_commit, is_full_sync, sync_state=None, state_key=None):
+    def _sync_step_by_step(self, work_dir, repo, source_branch, dest_branch, last_synced_commit, to_commit, is_full_sync, sync_state=None, state_key=None, add_original_hash=False):
         """
         Sync a branch commit-by-commit up to a specified ref.
+        Commits adding no large file are pushed in chunks instead of one by
+        one, each chunk adding at most lfs_threshold.
 
         Args:
             work_dir: Path to the working directory.
             repo: Repository config object.
             source_branch: Name of the source branch (e.g., "main").
+            dest_branch: Destination branch each commit is pushed to.
             last_synced_commit: SHA of the last synced commit (for incremental).
             to_commit: Target commit or ref to sync up to.
             is_full_sync: If True, ignore last_synced_commit and do full history.
             sync_state: Optional sync state dict; last_commits is updated per pushed commit.
             state_key: Key within last_commits for the branch being synced.
+            add_original_hash: Whether commit messages get the original SHA appended.
+
+        Returns 'synced' when every commit was pushed, 'failed' otherwise.
         """
+        log_stream = None
         try:
             # Determine the end reference: explicit to_commit or remote branch tip
             end_ref = to_commit or "source/%s" % source_branch
@@ -1692,86 +2379,177 @@ class GitSyncTool(object):
                 # Full: all commits reachable by end_ref
                 range_spec = end_ref
 
-            commits_cmd = 'git log --reverse --format="%%H" %s' % range_spec
+            # Commits are read as they get synced, the commit list is never held in memory. Subjects
+            # and the blobs each commit adds come along, so nothing is looked up commit by commit later
+            commits_cmd = ['git', 'log', '--reverse', '-z', '-m', '--raw', '--no-renames', '--no-abbrev',
+                           '--format=%H %s', range_spec]
+            log_stream = self._git_stream(commits_cmd, cwd=work_dir, separator=b'\0', read_only=True)
+            commits = _iter_raw_log_commits(log_stream)
 
-            # Execute the git log to retrieve commit list
+            # Peek at the first commit, git log fails before any output on a bad range
             try:
-                output = self._run_git_command(
-                    commits_cmd,
-                    cwd=work_dir,
-                    check_output=True
-                )
-                commits_to_sync = [
-                    line.strip() for line in output.splitlines() if line.strip()
-                ]
+                first_entry = next(commits, None)
             except Exception as e:
-                self.log_warn("Failed to get commits list: %s" % str(e))
-                return False
+                self.logger.warning("Failed to get commits list: %s", str(e))
+                return 'failed'
 
             # If there are no commits, nothing to do
-            if not commits_to_sync:
-                self.log_info("No commits to sync on %s up to %s" % (source_branch, end_ref))
-                return True
+            if first_entry is None:
+                self.logger.info("No commits to sync on %s up to %s", source_branch, end_ref)
+                return 'synced'
 
-            self.log_info(
-                "Syncing %d commits (from %s to %s)" % (
-                    len(commits_to_sync), commits_to_sync[0], commits_to_sync[-1]
-                )
-            )
+            first_commit = first_entry[0]
+            self.logger.info("Syncing commits from %s up to %s", first_commit, end_ref)
+            commits = itertools.chain([first_entry], commits)
 
             if is_full_sync:
                 try:
-                    self.log_debug("Resetting to first commit: %s" % commits_to_sync[0])
-                    self._run_git_command('git reset --hard %s' % commits_to_sync[0], cwd=work_dir)
+                    self.logger.debug("Resetting to first commit: %s", first_commit)
+                    self._run_git_command(['git', 'reset', '--hard', first_commit], cwd=work_dir)
                 except Exception as e:
-                    self.log_error("Failed to reset to first commit: %s" % str(e))
-                    return False
-
-            # Process each commit in order
-            process_count = 0
-            for commit_hash in commits_to_sync:
-                process_count += 1
-                self.log_debug("++++++++++Syncing commit: %s (%d/%d)" % (commit_hash, process_count, len(commits_to_sync)))
-                success = self._sync_single_commit(
+                    self.logger.error("Failed to reset to first commit: %s", str(e))
+                    return 'failed'
+
+            # Blobs a partial clone lacks come in one request, the size lookups below then fetch nothing
+            self._fetch_missing_range_objects(work_dir, range_spec)
+
+            # Commits adding no large file only differ from the source by, at most, their messages:
+            # they are cherry-picked in chunks that add at most lfs_threshold each, and pushed per chunk.
+            # A commit adding a large file goes through _sync_single_commit on its own for the LFS setup
+            batch = self._git_batch(work_dir, check_only=True)
+            chunk = []
+            chunk_bytes = 0
+            commit_count = 0
+            push_count = 0
+            # Only the first push may overwrite the destination, the later ones build on it
+            force_push = self.config.force_full
+            for commit_hash, subject, changes in commits:
+                commit_count += 1
+                size_bytes = 0
+                needs_lfs = False
+                for oid, path in changes:
+                    found = batch.get(oid)
+                    if found:
+                        size_bytes += found[2]
+                        if self._is_relevant_file(path) and self._should_use_lfs(found[2], repo.lfs_file_threshold_bytes):
+                            needs_lfs = True
+                
+                if chunk and (needs_lfs or chunk_bytes + size_bytes > repo.lfs_threshold_bytes):
+                    if not self._push_commit_chunk(work_dir, chunk, dest_branch, force_push, sync_state, state_key,
+                                                   add_original_hash):
+                        return 'failed'
+                    push_count += 1
+                    force_push = False
+                    chunk = []
+                    chunk_bytes = 0
+                if not needs_lfs:
+                    chunk.append(commit_hash)
+                    chunk_bytes += size_bytes
+                    continue
+                
+                self.logger.debug("++++++++++Syncing commit: %s (%d)", commit_hash, commit_count)
+                success, add_original_hash = self._sync_single_commit(
                     work_dir,
                     repo,
                     commit_hash,
                     source_branch,
-                    self.config.force_full
+                    dest_branch,
+                    force_push,
+                    add_original_hash,
+                    subject
                 )
                 if not success:
-                    return False
+                    return 'failed'
+                push_count += 1
+                force_push = False
 
                 if sync_state is not None and state_key is not None:
                     if sync_state.get('last_commits') is None:
                         sync_state['last_commits'] = {}
                     sync_state['last_commits'][state_key] = commit_hash
-                    self.log_debug("Updated sync state to commit %s" % commit_hash[:8])
+                    self.logger.debug("Updated sync state to commit %s", commit_hash[:8])
 
-            return True
+            if chunk:
+                if not self._push_commit_chunk(work_dir, chunk, dest_branch, force_push, sync_state, state_key,
+                                               add_original_hash):
+                    return 'failed'
+                push_count += 1
+            self.logger.info("Synced %d commits in %d pushes", commit_count, push_count)
+            return 'synced'
+
+        except Exception as e:
+            self.logger.error("Failed to sync step-by-step: %s", str(e))
+            return 'failed'
+        finally:
+            if log_stream is not None:
+                log_stream.close()
 
+    def _push_commit_chunk(self, work_dir, chunk, dest_branch, force_push=False, sync_state=None, state_key=None,
+                           add_original_hash=False):
+        """Cherry-pick the commits of chunk in one batch, push the branch and record the last one in last_commits
+        
+        A first commit HEAD already is (after a full sync reset) is pushed without
+        being picked again. force_push pushes with --force. With add_original_hash
+        the picked commits get the original SHA in their messages.
+        Returns False if a cherry-pick or the push failed.
+        """
+        picks = chunk[1:] if self._read_head(work_dir) == chunk[0] else chunk
+        base_commit = self._read_head(work_dir)
+        try:
+            self._cherry_pick_commits(work_dir, picks, add_original_hash)
         except Exception as e:
-            self.log_error("Failed to sync step-by-step: %s" % str(e))
+            self.logger.error("Failed to cherry-pick commits: %s", str(e))
+            self._quit_cherry_pick(work_dir)
             return False
-    
+        
+        if add_original_hash and picks:
+            try:
+                self._add_original_hashes(work_dir, base_commit)
+            except Exception as e:
+                self.logger.error("Failed to add original SHAs to commit messages: %s", str(e))
+                return False
+        
+        push_cmd = ['git', 'push', 'origin', 'HEAD:refs/heads/%s' % dest_branch]
+        if force_push:
+            push_cmd.append('--force')
+        try:
+            self._run_git_command(push_cmd, cwd=work_dir)
+        except Exception as push_error:
+            self.logger.error("Failed to push commits up to %s: %s", chunk[-1][:8], str(push_error))
+            return False
+        self.logger.debug("Pushed %d commits up to %s", len(chunk), chunk[-1][:8])
+        
+        if sync_state is not None and state_key is not None:
+            if sync_state.get('last_commits') is None:
+                sync_state['last_commits'] = {}
+            sync_state['last_commits'][state_key] = chunk[-1]
+        return True
+
     def run_sync(self):
         """Run synchronization for all repositories"""
-        self.log_info("Starting Git synchronization...")
+        self.logger.info("Starting Git synchronization...")
         self.report['summary']['start_time'] = datetime.now().isoformat()
         self.report['summary']['total_repos'] = len(self.config.repositories)
         
-        successful_repos = 0
-        failed_repos = 0
+        repositories = self.config.repositories
+        jobs = self.config.jobs or min(8, len(repositories))
+        if jobs > 1 and len(repositories) > 1:
+            # Each repository works in its own <workspace>/<name>/sync_work directory; entries
+            # that resolve to the same directory are serialized by _sync_repository_safe
+            self.logger.info("Synchronizing up to %d repositories in parallel", jobs)
         
-        for repo in self.config.repositories:
-            try:
-                if self.sync_repository(repo):
-                    successful_repos += 1
-                else:
-                    failed_repos += 1
-            except Exception as e:
-                self.log_error("Unexpected error syncing repository '%s': %s" % (repo.name, str(e)))
-                failed_repos += 1
+        try:
+            results = self._run_parallel(self._sync_repository_safe, repositories, jobs)
+        finally:
+            # The cat-file processes are only needed while syncing, stop them now rather than at exit
+            self._close_git_batches()
+        successful_repos = sum(1 for result in results if result)
+        failed_repos = len(results) - successful_repos
+        
+        # Keep the report in configuration order regardless of completion order
+        repo_reports = self.report['repositories']
+        self.report['repositories'] = dict((repo.name, repo_reports[repo.name])
+                                           for repo in repositories if repo.name in repo_reports)
         
         self.report['summary']['successful'] = successful_repos
         self.report['summary']['failed'] = failed_repos
@@ -1782,17 +2560,48 @@ class GitSyncTool(object):
         
         return failed_repos == 0
     
+    def _sync_repository_safe(self, repo):
+        """Synchronize a repository, converting unexpected errors into a failed result"""
+        work_dir = os.path.normcase(os.path.abspath(os.path.join(repo.workspace_path, repo.name, 'sync_work')))
+        with self._work_dir_locks_lock:
+            work_dir_lock = self._work_dir_locks[work_dir]
+        try:
+            with work_dir_lock:
+                return self.sync_repository(repo)
+        except Exception as e:
+            self.logger.error("Unexpected error syncing repository '%s': %s", repo.name, str(e))
+            return False
+    
+    def _run_parallel(self, func, items, max_workers):
+        """Run func for every item on a thread pool and return the results in order"""
+        if max_workers <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+        pool = ThreadPool(max_workers)
+        try:
+            async_result = pool.map_async(func, items)
+            # Only a wait with a timeout is interruptible by Ctrl+C on Python 2, poll without a deadline
+            while not async_result.ready():
+                async_result.wait(1)
+            results = async_result.get()
+        except BaseException:
+            # Drop the items not started yet and do not wait for the running ones
+            pool.terminate()
+            raise
+        pool.close()
+        pool.join()
+        return results
+    
     def _print_summary_report(self):
         """Print summary report in table format"""
-        self.log_info("")
-        self.log_info("-------------------- Synchronization Report --------------------")
+        self.logger.info("")
+        self.logger.info("-------------------- Synchronization Report --------------------")
         
         # Table header with Failed column
         header = "%-20s | %-11s | %-8s | %-8s | %-8s | %-6s | %-7s | %-5s | %s" % (
             "Repository", "Mode", "Synced", "Skipped", "New", "Failed", "Ignored", "LFS", "Status"
         )
-        self.log_info(header)
-        self.log_info("-" * len(header))
+        self.logger.info(header)
+        self.logger.info("-" * len(header))
         
         # Table rows
         for repo_name, repo_report in self.report['repositories'].items():
@@ -1809,15 +2618,14 @@ class GitSyncTool(object):
                 repo_name[:20], mode, str(synced), str(skipped), str(new_branches), 
                 str(failed), str(ignored_count), lfs, status
             )
-            self.log_info(row)
+            self.logger.info(row)
         
-        self.log_info("-" * len(header))
+        self.logger.info("-" * len(header))
         
         # Summary statistics
         summary = self.report['summary']
-        self.log_info("Total: %d repositories, Successful: %d, Failed: %d" % (
-            summary['total_repos'], summary['successful'], summary['failed']
-        ))
+        self.logger.info("Total: %d repositories, Successful: %d, Failed: %d",
+                         summary['total_repos'], summary['successful'], summary['failed'])
 
 
 if __name__ == '__main__':
@@ -1845,6 +2653,10 @@ Features:
                        help='Force full sync for all repositories')
     parser.add_argument('-v', '--verbose', action='store_true', 
                        help='Enable verbose/debug output')
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                       help='Number of repositories to sync in parallel (default: min(8, repositories))')
+    parser.add_argument('--branch-jobs', type=int, default=0,
+                       help='Number of branches to sync in parallel per repository (default: min(8, branches))')
     
     args = parser.parse_args()
     
@@ -1852,6 +2664,8 @@ Features:
     tool = GitSyncTool()
     tool.config.force_full = args.force_full
     tool.config.verbose = args.verbose
+    tool.config.jobs = args.jobs
+    tool.config.branch_jobs = args.branch_jobs
     tool.verbose = args.verbose  # Set verbose attribute for _run_git_command
     
     if tool.config.verbose:
@@ -1864,26 +2678,26 @@ Features:
         # Load configuration
         tool.load_config(args.config)
         
-        tool.log_info("Git sync tool initialized successfully.")
-        tool.log_info("Configuration: %d repositories, force_full=%s" % (
-            len(tool.config.repositories), tool.config.force_full))
+        tool.logger.info("Git sync tool initialized successfully.")
+        tool.logger.info("Configuration: %d repositories, force_full=%s",
+                         len(tool.config.repositories), tool.config.force_full)
         
         # Run synchronization
         success = tool.run_sync()
         
         if success:
-            tool.log_info("All repositories synchronized successfully!")
+            tool.logger.info("All repositories synchronized successfully!")
             sys.exit(0)
         else:
-            tool.log_error("Some repositories failed to synchronize. Check the report above.")
+            tool.logger.error("Some repositories failed to synchronize. Check the report above.")
             sys.exit(1)
         
     except KeyboardInterrupt:
-        tool.log_info("\nSynchronization interrupted by user.")
+        tool.logger.info("\nSynchronization interrupted by user.")
         sys.exit(130)
     except Exception as e:
-        tool.log_error("Synchronization failed: %s" % str(e))
+        tool.logger.error("Synchronization failed: %s", str(e))
         if tool.config.verbose:
             import traceback
-            tool.log_error("Full traceback:\n%s" % traceback.format_exc())
+            tool.logger.error("Full traceback:\n%s", traceback.format_exc())
         sys.exit(1)